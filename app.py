@@ -1,16 +1,164 @@
-from flask import Flask, render_template, request, jsonify
+import time
+
+# Measured from the first line so the boot report covers every import
+_boot_started = time.perf_counter()
+
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context, g
 import os
 import json
-from fuzzy_grammar.fuzzy_system import FuzzyGrammarSystem
-from fuzzy_grammar.grammar_analyzer import GrammarAnalyzer
-from fuzzy_grammar.feedback_generator import FeedbackGenerator
+import queue
+import threading
+from types import SimpleNamespace
+from fuzzy_grammar.result_cache import AnalysisCache, normalize_text
+from fuzzy_grammar import metrics
+from fuzzy_grammar.admission import AdmissionQueue, Overloaded
+from fuzzy_grammar.deadline import Deadline
 
 app = Flask(__name__)
 
-# Initialize our components
-fuzzy_system = FuzzyGrammarSystem()
-grammar_analyzer = GrammarAnalyzer()
-feedback_generator = FeedbackGenerator()
+print(f"Imported app modules in {time.perf_counter() - _boot_started:.2f}s")
+
+# Sentences parsed per nlp.pipe batch by /analyze_stream (bounds time-to-first-result)
+STREAM_BATCH_SIZE = int(os.environ.get('ANALYZE_STREAM_BATCH_SIZE', '8'))
+
+# Limits and spaCy pipe settings for /analyze_batch
+BATCH_MAX_ITEMS = int(os.environ.get('ANALYZE_BATCH_MAX_ITEMS', '200'))
+BATCH_SIZE = int(os.environ.get('ANALYZE_BATCH_SIZE', '32'))
+BATCH_N_PROCESS = int(os.environ.get('ANALYZE_BATCH_N_PROCESS', '1'))
+
+# LRU cache of complete /analyze responses (ANALYZE_CACHE_MAX_ENTRIES=0 disables it)
+analysis_cache = AnalysisCache(
+    max_entries=int(os.environ.get('ANALYZE_CACHE_MAX_ENTRIES', '1024')),
+    max_bytes=int(os.environ.get('ANALYZE_CACHE_MAX_BYTES', str(32 * 1024 * 1024))),
+    ttl=float(os.environ.get('ANALYZE_CACHE_TTL', '0')) or None
+)
+
+# ANALYZE_TIERED=1 runs the tagger and parser only for texts whose rules need them
+TIERED = os.environ.get('ANALYZE_TIERED', '0') == '1'
+
+# ANALYZE_WORKERS>0 runs analysis and scoring on a worker pool behind a bounded queue:
+# at most ANALYZE_QUEUE_SIZE requests wait, and requests that waited longer than
+# ANALYZE_MAX_QUEUE_WAIT seconds are dropped; shed requests get 429/503 with Retry-After
+ANALYZE_WORKERS = int(os.environ.get('ANALYZE_WORKERS', '0'))
+admission_queue = AdmissionQueue(
+    max_workers=ANALYZE_WORKERS,
+    max_queue=int(os.environ.get('ANALYZE_QUEUE_SIZE', str(4 * ANALYZE_WORKERS))),
+    max_wait=float(os.environ.get('ANALYZE_MAX_QUEUE_WAIT', '0')) or None
+) if ANALYZE_WORKERS > 0 else None
+
+# Default per-request time budget of /analyze, /analyze_batch and /analyze_stream in ms
+# (0 = none); clients can send their own "time_budget_ms", 0 turning it off. Once it is
+# spent the remaining optional checks are skipped and the response is flagged "truncated"
+TIME_BUDGET_MS = float(os.environ.get('ANALYZE_TIME_BUDGET_MS', '0'))
+
+# Wall time of every request, by endpoint and status (streamed bodies are not included)
+REQUEST_SECONDS = metrics.REGISTRY.histogram(
+    'grammar_http_request_duration_seconds',
+    'Time to build the response of each HTTP request',
+    ('endpoint', 'status'))
+
+CACHE_LOOKUPS = metrics.REGISTRY.counter(
+    'grammar_cache_lookups_total',
+    'Result cache lookups of /analyze, by outcome',
+    ('result',))
+
+# Analysis components (spaCy, enchant, scikit-fuzzy) are built on first use
+_components = None
+_components_lock = threading.Lock()
+_ready = threading.Event()
+_warm_up_error = None
+_time_to_ready = None
+
+def _build_components():
+    """Import the heavy libraries and build the analysis components"""
+    from fuzzy_grammar.fuzzy_system import FuzzyGrammarSystem
+    from fuzzy_grammar.grammar_analyzer import GrammarAnalyzer
+    from fuzzy_grammar.feedback_generator import FeedbackGenerator
+    from fuzzy_grammar.incremental import IncrementalAnalyzer
+    
+    # FUZZY_COMPILED=1 answers fuzzy evaluations from a precomputed severity table,
+    # optionally cached on disk at FUZZY_TABLE_PATH (.npy)
+    fuzzy_system = FuzzyGrammarSystem(
+        compiled=os.environ.get('FUZZY_COMPILED', '0') == '1',
+        table_path=os.environ.get('FUZZY_TABLE_PATH') or None,
+        table_step=int(os.environ.get('FUZZY_TABLE_STEP', '5'))
+    )
+    if fuzzy_system.compiled:
+        print(f"Compiled fuzzy severity table (max deviation {fuzzy_system.table_max_deviation:.3f})")
+    # ANALYZER_PROFILE (full, tagged, lexical) limits the rules; unneeded spaCy components are not loaded
+    grammar_analyzer = GrammarAnalyzer(profile=os.environ.get('ANALYZER_PROFILE') or None)
+    
+    return SimpleNamespace(
+        fuzzy_system=fuzzy_system,
+        grammar_analyzer=grammar_analyzer,
+        feedback_generator=FeedbackGenerator(),
+        # Sentence-level cache for {"incremental": true} requests from the live editor
+        incremental_analyzer=IncrementalAnalyzer(
+            grammar_analyzer,
+            max_sentences=int(os.environ.get('INCREMENTAL_MAX_SENTENCES', '4096'))
+        ),
+        # Cached responses are only valid for the rule set and fuzzy mode that produced them
+        ruleset_version='{}:{}'.format(
+            grammar_analyzer.ruleset_version,
+            f'compiled-{fuzzy_system.table_fingerprint[:16]}' if fuzzy_system.compiled else 'exact'
+        )
+    )
+
+def get_components():
+    """Return the analysis components, building them on first use"""
+    global _components
+    if _components is None:
+        with _components_lock:
+            if _components is None:
+                _components = _build_components()
+    return _components
+
+def warm_up():
+    """
+    Load every model and run one analysis so the first request is not slow
+    
+    Sets the readiness flag reported by /ready. Safe to call more than once.
+    
+    Returns:
+        bool: True if the components are ready
+    """
+    global _warm_up_error, _time_to_ready
+    try:
+        components = get_components()
+        analysis = components.grammar_analyzer.analyze("This is a short warm-up sentence.", "Simple Present")
+        components.fuzzy_system.evaluate(
+            analysis['grammar_match'], analysis['error_frequency'], analysis['complexity'])
+    except Exception as e:
+        _warm_up_error = str(e)
+        print(f"Error warming up: {e}")
+        metrics.FAILURES.inc('warm_up')
+        return False
+    
+    if not _ready.is_set():
+        _time_to_ready = time.perf_counter() - _boot_started
+        _ready.set()
+        print(f"Ready in {_time_to_ready:.2f}s")
+    return True
+
+# LAZY_STARTUP=1 lets the server bind at once and loads the models in the background;
+# otherwise they are loaded before the app finishes importing
+if os.environ.get('LAZY_STARTUP', '0') == '1':
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+else:
+    warm_up()
+
+@app.before_request
+def _start_timer():
+    """Remember when the request started, for the latency histogram"""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def _record_latency(response):
+    """Observe the request latency once the response is built"""
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, request.endpoint or 'unknown', response.status_code)
+    return response
 
 @app.route('/')
 def index():
@@ -20,48 +168,398 @@ def index():
 @app.route('/analyze', methods=['POST'])
 def analyze():
     """Analyze the provided text and return feedback"""
+    # The budget counts from arrival, so time spent waiting for a worker is included
+    arrived = time.perf_counter()
+    components = get_components()
     data = request.get_json()
-    text = data.get('text', '')
+    text = normalize_text(data.get('text', ''))
     tense = data.get('tense', '')
     
+    # Incremental mode re-checks only changed sentences; it needs an explicit tense
+    incremental = bool(data.get('incremental')) and bool(tense)
+    
+    # {"profile": "lexical"} runs a smaller rule set (and fewer spaCy components); needs a tense
+    profile = data.get('profile') if tense and not incremental else None
+    
+    # Tiered mode also needs a tense; {"depth": "full"} forces the whole pipeline
+    tiered = TIERED and bool(tense) and not incremental and not profile
+    full_depth = data.get('depth') == 'full'
+    
     if not text:
         return jsonify({'error': 'No text provided'}), 400
     
-    # Step 1: Analyze grammar
-    analysis_result = grammar_analyzer.analyze(text, tense)
+    if profile and profile not in components.grammar_analyzer.rule_registry.profiles:
+        return jsonify({'error': f'Unknown profile: {profile}'}), 400
+    
+    try:
+        deadline = _request_deadline(data, arrived)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'time_budget_ms must be a number'}), 400
+    # Incremental analysis reuses cached sentences and does not take a budget
+    if incremental:
+        deadline = None
+    
+    # Identical requests are answered from the cache
+    version = components.ruleset_version + (':incremental' if incremental else '') + \
+        (f':tiered-{"full" if full_depth else "auto"}' if tiered else '') + \
+        (f':profile-{profile}' if profile else '')
+    cache_key = AnalysisCache.make_key(text, tense, version)
+    cached = analysis_cache.get(cache_key)
+    if cached is not None:
+        CACHE_LOOKUPS.inc('hit')
+        return jsonify(cached)
+    CACHE_LOOKUPS.inc('miss')
+    
+    try:
+        response = _offload(_analyze_text, components, text, tense, incremental, tiered, full_depth, profile,
+                            cache_key, deadline)
+    except Overloaded as e:
+        return _overloaded_response(e)
+    
+    # Error offsets refer to the normalized text
+    response['text'] = text
+    # Partial results are not cached: the same text may finish within budget next time
+    if not response.get('truncated'):
+        analysis_cache.put(cache_key, response)
+    return jsonify(response)
+
+def _request_deadline(data, arrived):
+    """
+    Time budget of a request: its "time_budget_ms", or TIME_BUDGET_MS if it sends none
+    
+    An explicit 0 turns the budget off, even when TIME_BUDGET_MS sets one.
+    
+    Args:
+        data (dict): The request body
+        arrived (float): time.perf_counter() value at the request's arrival
+    
+    Returns:
+        Deadline: The budget, or None without one
+    
+    Raises:
+        TypeError, ValueError: If time_budget_ms is not a number
+    """
+    budget_ms = data.get('time_budget_ms')
+    budget_ms = TIME_BUDGET_MS if budget_ms is None else float(budget_ms)
+    return Deadline(budget_ms, started=arrived) if budget_ms > 0 else None
+
+def _analyze_text(components, text, tense, incremental, tiered, full_depth, profile, cache_key, deadline=None):
+    """Analyze, score and build the feedback for one /analyze request"""
+    # Step 1: Analyze grammar; without a tense, detect the intended one from the same parse
+    analyzer = components.grammar_analyzer
+    if incremental:
+        analysis_result = components.incremental_analyzer.analyze(text, tense)
+    elif tiered:
+        analysis_result = analyzer.analyze_tiered(text, tense, full=full_depth, deadline=deadline)
+    elif tense:
+        analysis_result = analyzer.analyze(text, tense, rules=profile, deadline=deadline)
+    else:
+        analysis_result = analyzer.analyze_with_tense_suggestion(text, deadline=deadline)
     
     # If the text is not valid English, return early with error
     if not analysis_result.get('is_valid_english', True):
-        return jsonify({
-            'analysis': analysis_result,
-            'feedback': {
-                'severity_level': 'High',
-                'overall_feedback': 'The input does not appear to be valid English.',
-                'specific_feedback': [],
-                'suggestions': ['Please enter valid English text.'],
-                'resources': []
-            }
-        })
-    
-    # Step 2: Feed the analysis results to the fuzzy system
-    fuzzy_result = fuzzy_system.evaluate(
-        analysis_result['grammar_match'], 
-        analysis_result['error_frequency'], 
-        analysis_result['complexity']
-    )
+        response = _invalid_english_response(analysis_result)
+    else:
+        # Step 2: Feed the analysis results to the fuzzy system
+        fuzzy_result = components.fuzzy_system.evaluate(
+            analysis_result['grammar_match'], 
+            analysis_result['error_frequency'], 
+            analysis_result['complexity']
+        )
+        
+        # Step 3: Generate feedback based on analysis and fuzzy results
+        # Seeding with the cache key makes fresh and cached responses identical
+        response = _build_response(analysis_result, fuzzy_result,
+                                   tense or analysis_result.get('suggested_tense'), seed=cache_key)
     
-    # Step 3: Generate feedback based on analysis and fuzzy results
-    feedback = feedback_generator.generate_feedback(analysis_result, fuzzy_result, tense)
+    # Always present, so cached and fresh responses have the same shape with or without a budget
+    response['truncated'] = analysis_result.get('truncated', False)
+    return response
+
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_batch():
+    """Analyze a list of texts in one request and return per-item feedback"""
+    arrived = time.perf_counter()
+    data = request.get_json()
+    texts = data.get('texts') if data else None
+    tense = data.get('tense', '') if data else ''
     
-    return jsonify({
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'error': 'No texts provided'}), 400
+    
+    if len(texts) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'Too many texts (maximum is {BATCH_MAX_ITEMS})'}), 400
+    
+    # One budget for the whole batch, counted from arrival as in /analyze
+    try:
+        deadline = _request_deadline(data, arrived)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'time_budget_ms must be a number'}), 400
+    
+    # Same normalization as /analyze; non-string items are rejected per item
+    texts = [normalize_text(text) if isinstance(text, str) else text for text in texts]
+    
+    components = get_components()
+    
+    try:
+        items = _offload(_analyze_texts, components, texts, tense, deadline)
+    except Overloaded as e:
+        return _overloaded_response(e)
+    
+    return jsonify({'results': items})
+
+def _analyze_texts(components, texts, tense, deadline=None):
+    """Analyze, score and build the feedback for every item of an /analyze_batch request"""
+    # Step 1: Analyze grammar, parsing all texts together
+    analysis_results = components.grammar_analyzer.analyze_many(
+        texts, tense, batch_size=BATCH_SIZE, n_process=BATCH_N_PROCESS, deadline=deadline)
+    
+    # Step 2: Score every valid item with one vectorized fuzzy evaluation
+    valid = [i for i, result in enumerate(analysis_results)
+             if 'error' not in result and result.get('is_valid_english', True)]
+    fuzzy_results = {}
+    if valid:
+        batch = components.fuzzy_system.evaluate_batch(
+            [analysis_results[i]['grammar_match'] for i in valid],
+            [analysis_results[i]['error_frequency'] for i in valid],
+            [analysis_results[i]['complexity'] for i in valid]
+        )
+        for i, score, level in zip(valid, batch['severity_score'], batch['severity_level']):
+            fuzzy_results[i] = {'severity_score': float(score), 'severity_level': str(level)}
+    
+    # Step 3: Build each item's response on its own so one failure does not sink the batch
+    items = []
+    for i, analysis_result in enumerate(analysis_results):
+        try:
+            if 'error' in analysis_result:
+                items.append({'error': analysis_result['error']})
+            elif i not in fuzzy_results:
+                items.append(dict(_invalid_english_response(analysis_result), text=texts[i],
+                                  truncated=analysis_result.get('truncated', False)))
+            else:
+                seed = AnalysisCache.make_key(texts[i], tense, components.ruleset_version)
+                # Error offsets refer to the normalized text
+                items.append(dict(_build_response(analysis_result, fuzzy_results[i], tense, seed=seed),
+                                  text=texts[i], truncated=analysis_result.get('truncated', False)))
+        except Exception as e:
+            print(f"Error building feedback for item {i}: {e}")
+            metrics.FAILURES.inc('feedback')
+            items.append({'error': f'Error generating feedback: {str(e)}'})
+    
+    return items
+
+def _offload(function, *args):
+    """Run CPU-heavy work on the admission queue's workers, or inline when it is disabled"""
+    if admission_queue is None:
+        return function(*args)
+    return admission_queue.run(function, *args)
+
+def _overloaded_response(error):
+    """429/503 response with a Retry-After header for a shed request"""
+    response = jsonify({'error': 'Server is busy, please retry later', 'reason': error.reason,
+                        'retry_after': error.retry_after})
+    response.status_code = error.status
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+@app.route('/analyze_stream', methods=['POST'])
+def analyze_stream():
+    """
+    Analyze a long text and stream the results as newline-delimited JSON
+    
+    Emits a 'start' event, one 'chunk' event per sentence with its errors and
+    corrected text as soon as it is checked, and a final 'summary' event with
+    the same body /analyze would return for the whole text.
+    """
+    arrived = time.perf_counter()
+    data = request.get_json()
+    text = normalize_text(data.get('text', '')) if data else ''
+    tense = data.get('tense', '') if data else ''
+    
+    if not text:
+        return jsonify({'error': 'No text provided'}), 400
+    
+    try:
+        deadline = _request_deadline(data, arrived)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'time_budget_ms must be a number'}), 400
+    
+    components = get_components()
+    
+    # With a worker pool the stream takes an admission slot like /analyze does
+    events = _stream_events(components, text, tense, deadline)
+    if admission_queue is not None:
+        try:
+            events = _offload_stream(events)
+        except Overloaded as e:
+            return _overloaded_response(e)
+    
+    return Response(stream_with_context(events), mimetype='application/x-ndjson')
+
+def _stream_events(components, text, tense, deadline=None):
+    """Analyze one /analyze_stream request and yield its NDJSON events"""
+    yield _ndjson({'event': 'start', 'text': text})
+    
+    try:
+        # Without a tense the intended one is detected, as /analyze does
+        for kind, payload in components.grammar_analyzer.analyze_stream(
+                text, tense or None, batch_size=STREAM_BATCH_SIZE, detect_tense=not tense, deadline=deadline):
+            if kind == 'chunk':
+                yield _ndjson(dict(payload, event='chunk'))
+                continue
+            
+            # Document-level scoring once every sentence is in
+            if not payload.get('is_valid_english', True):
+                response = _invalid_english_response(payload)
+            else:
+                fuzzy_result = components.fuzzy_system.evaluate(
+                    payload['grammar_match'],
+                    payload['error_frequency'],
+                    payload['complexity']
+                )
+                seed = AnalysisCache.make_key(text, tense, components.ruleset_version + ':stream')
+                response = _build_response(payload, fuzzy_result, tense or payload.get('suggested_tense'),
+                                           seed=seed)
+            response['text'] = text
+            response['truncated'] = payload.get('truncated', False)
+            yield _ndjson(dict(response, event='summary'))
+    except Exception as e:
+        print(f"Error streaming analysis: {e}")
+        metrics.FAILURES.inc('stream')
+        yield _ndjson({'event': 'error', 'error': f'Error analyzing text: {str(e)}'})
+
+# Markers passed from a stream's worker to the response
+_STREAM_STARTED = object()
+_STREAM_END = object()
+
+def _offload_stream(events):
+    """
+    Produce a streamed response's events on an admission queue worker
+    
+    The worker holds its slot until the last event is produced; the events
+    are handed to the response through an unbounded queue, so a slow client
+    does not keep a worker busy. Returns only once a worker has picked the
+    stream up, so a shed stream is answered with 429/503 instead of a
+    started body. If the client disconnects, the worker stops at the next
+    event.
+    
+    Args:
+        events (generator): The response body, one event per item
+    
+    Returns:
+        generator: The same events, read from the worker
+    
+    Raises:
+        Overloaded: If the queue is full or the stream expired in it
+    """
+    produced = queue.Queue()
+    cancelled = threading.Event()
+    
+    def produce():
+        produced.put(_STREAM_STARTED)
+        try:
+            for event in events:
+                if cancelled.is_set():
+                    break
+                produced.put(event)
+        finally:
+            events.close()
+    
+    future = admission_queue.submit(produce)
+    future.add_done_callback(lambda done: produced.put(_STREAM_END))
+    
+    if produced.get() is _STREAM_END:
+        # Never started: raises the Overloaded of a queue timeout
+        future.result()
+        return iter(())
+    
+    def relay():
+        try:
+            while True:
+                event = produced.get()
+                if event is _STREAM_END:
+                    return
+                yield event
+        finally:
+            cancelled.set()
+    
+    return relay()
+
+def _ndjson(event):
+    """Serialize one event of a newline-delimited JSON stream"""
+    return json.dumps(event) + '\n'
+
+def _build_response(analysis_result, fuzzy_result, tense, seed=None):
+    """Combine analysis, fuzzy result and generated feedback into the API response"""
+    feedback = get_components().feedback_generator.generate_feedback(analysis_result, fuzzy_result, tense, seed=seed)
+    
+    return {
         'analysis': analysis_result,
         'fuzzy_result': {
             'severity_score': fuzzy_result['severity_score'],
             'severity_level': fuzzy_result['severity_level']
         },
         'feedback': feedback
+    }
+
+def _invalid_english_response(analysis_result):
+    """API response for input that is not valid English"""
+    return {
+        'analysis': analysis_result,
+        'feedback': {
+            'severity_level': 'High',
+            'overall_feedback': 'The input does not appear to be valid English.',
+            'specific_feedback': [],
+            'suggestions': ['Please enter valid English text.'],
+            'resources': []
+        }
+    }
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Report result cache occupancy and hit/miss/eviction counters, including the word-check memo"""
+    components = _components
+    return jsonify(dict(
+        analysis_cache.stats(),
+        ruleset_version=components.ruleset_version if components else None,
+        sentences=components.incremental_analyzer.stats() if components else None,
+        lexicon=components.grammar_analyzer.lexicon.memo_info() if components else None
+    ))
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Stage/detector latency histograms and hit/failure counters in the Prometheus text format"""
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/admission/stats')
+def admission_stats():
+    """Report the admission queue limits, depth and counters"""
+    if admission_queue is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(admission_queue.stats(), enabled=True))
+
+@app.route('/rules')
+def rules():
+    """List the registered rules, the active ones and the loaded spaCy components"""
+    analyzer = get_components().grammar_analyzer
+    return jsonify({
+        'rules': analyzer.rule_registry.describe(analyzer.active_rules),
+        'profiles': sorted(analyzer.rule_registry.profiles),
+        'pipeline': analyzer.nlp.pipe_names
     })
 
+@app.route('/tiers/stats')
+def tier_stats():
+    """Report how many tiered analyses stopped at each tier and their mean latency"""
+    return jsonify(dict(get_components().grammar_analyzer.tiered_parser.stats.stats(), enabled=TIERED))
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once the models are loaded and warmed up, 503 before"""
+    if _ready.is_set():
+        return jsonify({'ready': True, 'time_to_ready': _time_to_ready})
+    return jsonify({'ready': False, 'error': _warm_up_error}), 503
+
 @app.route('/about')
 def about():
     """Render the about page"""
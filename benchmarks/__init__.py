@@ -0,0 +1,7 @@
+"""
+Performance benchmarks for the grammar analysis pipeline
+
+``python -m benchmarks.run`` times the analyzer, each error detector, the
+fuzzy system and the feedback generator on the bundled learner corpus
+(``benchmarks/data``) and can compare the results with a stored baseline.
+"""
@@ -0,0 +1,276 @@
+"""
+Reproducible benchmark of the analysis pipeline on the bundled learner corpus
+
+Times GrammarAnalyzer.analyze, every detector of _detect_errors on its own
+(one rule from the rule registry at a time, on pre-parsed documents),
+FuzzyGrammarSystem.evaluate and FeedbackGenerator.generate_feedback for
+single sentences, paragraphs and 2k-word essays. Reports p50/p99/mean
+latency and throughput per target as JSON.
+
+With --baseline, each target's latency is compared with the stored run and
+the exit status is 1 when any target is slower by more than --threshold.
+Baselines are machine-specific: record one with --save-baseline on the
+machine that will run the comparison.
+
+Usage:
+    python -m benchmarks.run
+    python -m benchmarks.run --only analyze --repeat 5 --output results.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --threshold 0.2
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import sys
+import time
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'learner_corpus_v1.json')
+
+# Corpus sections, from shortest to longest input
+SIZES = ('sentences', 'paragraphs', 'essays')
+
+
+def load_corpus(path=CORPUS_PATH):
+    """
+    Load a benchmark corpus
+    
+    Essays are stored as lists of paragraph ids and joined with blank lines.
+    
+    Args:
+        path (str): Path of the corpus JSON file
+    
+    Returns:
+        dict: 'version' plus, per size, a list of (text, tense) pairs
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    
+    paragraphs = {item['id']: item['text'] for item in data['paragraphs']}
+    corpus = {'version': data['version']}
+    corpus['sentences'] = [(item['text'], item.get('tense')) for item in data['sentences']]
+    corpus['paragraphs'] = [(item['text'], item.get('tense')) for item in data['paragraphs']]
+    corpus['essays'] = [('\n\n'.join(paragraphs[pid] for pid in item['paragraphs']), item.get('tense'))
+                        for item in data['essays']]
+    return corpus
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def measure(function, items, repeat=3, warmup=1):
+    """
+    Time ``function`` on every item
+    
+    Args:
+        function (callable): Called with one item per call
+        items (list): Inputs
+        repeat (int): Timed rounds over all items
+        warmup (int): Untimed rounds run first
+    
+    Returns:
+        dict: calls, p50_ms, p99_ms, mean_ms, max_ms and throughput_per_s
+    """
+    for _ in range(warmup):
+        for item in items:
+            function(item)
+    
+    latencies = []
+    for _ in range(repeat):
+        for item in items:
+            started = time.perf_counter()
+            function(item)
+            latencies.append(time.perf_counter() - started)
+    
+    latencies.sort()
+    total = sum(latencies)
+    return {
+        'calls': len(latencies),
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': total / max(1, len(latencies)) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+        'throughput_per_s': len(latencies) / total if total else 0.0
+    }
+
+
+def run_benchmarks(analyzer, fuzzy_system, feedback_generator, corpus, repeat=3, warmup=1, only=None):
+    """
+    Benchmark every target on every corpus size
+    
+    Args:
+        analyzer (GrammarAnalyzer): Analyzer under test
+        fuzzy_system (FuzzyGrammarSystem): Fuzzy system under test
+        feedback_generator (FeedbackGenerator): Feedback generator under test
+        corpus (dict): Result of load_corpus()
+        repeat (int): Timed rounds per target
+        warmup (int): Untimed rounds per target
+        only (list, optional): Name prefixes of the targets to run
+    
+    Returns:
+        dict: Target name (e.g. 'analyze.essays') -> latency statistics
+    """
+    results = {}
+    
+    def add(name, function, items):
+        if only and not any(name.startswith(prefix) for prefix in only):
+            return
+        print(f"Running {name} ({len(items)} items x {repeat})", file=sys.stderr)
+        results[name] = measure(function, items, repeat, warmup)
+    
+    for size in SIZES:
+        items = corpus[size]
+        add(f'analyze.{size}', lambda item: analyzer.analyze(item[0], item[1]), items)
+        
+        # Detectors run alone on documents parsed once up front
+        prepared = []
+        for text, tense in items:
+            doc = analyzer.nlp(text)
+            prepared.append((doc, text, tense, analyzer._extract_subjects(doc)))
+        for rule in analyzer.rule_registry.names():
+            if rule in analyzer.active_rules:
+                add(f'detector.{rule}.{size}',
+                    lambda item, rules=frozenset([rule]): analyzer._detect_errors(*item, rules=rules),
+                    prepared)
+        
+        analyses = [(analyzer.analyze(text, tense), tense) for text, tense in items]
+        add(f'fuzzy.evaluate.{size}',
+            lambda item: fuzzy_system.evaluate(
+                item[0]['grammar_match'], item[0]['error_frequency'], item[0]['complexity']),
+            analyses)
+        
+        scored = [(analysis, fuzzy_system.evaluate(
+                       analysis['grammar_match'], analysis['error_frequency'], analysis['complexity']), tense)
+                  for analysis, tense in analyses]
+        add(f'feedback.generate.{size}',
+            lambda item: feedback_generator.generate_feedback(item[0], item[1], item[2], seed=0),
+            scored)
+    
+    return results
+
+
+def compare(results, baseline, threshold=0.2, metric='p50_ms', min_delta_ms=0.05):
+    """
+    Compare results with a baseline run
+    
+    Args:
+        results (dict): Target name -> statistics of this run
+        baseline (dict): Output of an earlier run (its 'results' are used)
+        threshold (float): Allowed relative slowdown (0.2 = 20%)
+        metric (str): Statistic to compare
+        min_delta_ms (float): Slowdowns smaller than this are ignored as noise
+    
+    Returns:
+        dict: Per-target ratios and the list of regressed targets
+    """
+    base_results = baseline.get('results', {})
+    targets = {}
+    regressions = []
+    
+    for name, current in sorted(results.items()):
+        base = base_results.get(name)
+        if not base or metric not in base:
+            continue
+        
+        ratio = current[metric] / base[metric] if base[metric] else float('inf')
+        regressed = ratio > 1 + threshold and current[metric] - base[metric] > min_delta_ms
+        targets[name] = {'baseline': base[metric], 'current': current[metric], 'ratio': ratio, 'regressed': regressed}
+        if regressed:
+            regressions.append(name)
+    
+    return {
+        'metric': metric,
+        'threshold': threshold,
+        'baseline_corpus_version': baseline.get('corpus_version'),
+        'targets': targets,
+        'regressions': regressions
+    }
+
+
+def environment(analyzer):
+    """Describe the machine and model the run used"""
+    meta = getattr(analyzer.nlp, 'meta', {}) or {}
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'spacy_model': f"{meta.get('lang', '')}_{meta.get('name', '')}-{meta.get('version', '')}",
+        'pipeline': list(analyzer.nlp.pipe_names)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', default=CORPUS_PATH, help='Corpus JSON file')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed rounds per target')
+    parser.add_argument('--warmup', type=int, default=1, help='Untimed rounds per target')
+    parser.add_argument('--only', default='', help='Comma-separated target name prefixes (e.g. analyze,detector.tense)')
+    parser.add_argument('--output', help='Write the results JSON here instead of stdout')
+    parser.add_argument('--baseline', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed relative slowdown before failing')
+    parser.add_argument('--metric', default='p50_ms', choices=('p50_ms', 'p99_ms', 'mean_ms'),
+                        help='Statistic compared with the baseline')
+    parser.add_argument('--save-baseline', help='Also write the results to this path as the new baseline')
+    args = parser.parse_args(argv)
+    
+    corpus = load_corpus(args.corpus)
+    only = [prefix for prefix in args.only.split(',') if prefix]
+    
+    # Library prints go to stderr so stdout stays valid JSON
+    with contextlib.redirect_stdout(sys.stderr):
+        from fuzzy_grammar.grammar_analyzer import GrammarAnalyzer
+        from fuzzy_grammar.fuzzy_system import FuzzyGrammarSystem
+        from fuzzy_grammar.feedback_generator import FeedbackGenerator
+        
+        analyzer = GrammarAnalyzer()
+        results = run_benchmarks(analyzer, FuzzyGrammarSystem(), FeedbackGenerator(), corpus,
+                                 repeat=args.repeat, warmup=args.warmup, only=only)
+    
+    report = {
+        'corpus_version': corpus['version'],
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': {'repeat': args.repeat, 'warmup': args.warmup},
+        'environment': environment(analyzer),
+        'results': results
+    }
+    
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('corpus_version') != corpus['version']:
+            print(f"Baseline was recorded on corpus version {baseline.get('corpus_version')}, "
+                  f"not {corpus['version']}; results are not comparable", file=sys.stderr)
+            status = 2
+        else:
+            report['comparison'] = compare(results, baseline, args.threshold, args.metric)
+            for name in report['comparison']['regressions']:
+                target = report['comparison']['targets'][name]
+                print(f"REGRESSION {name}: {target['baseline']:.3f} -> {target['current']:.3f} ms "
+                      f"({target['ratio']:.2f}x)", file=sys.stderr)
+            if report['comparison']['regressions']:
+                status = 1
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Benchmark subject extraction on the per-doc index against the old nested scan
+
+Builds run-on texts of increasing length from the learner corpus, parses
+each once and times GrammarAnalyzer._extract_subjects next to the scan it
+replaced, after checking that both find the same subjects. The indexed
+extraction should grow linearly with the number of tokens; the exit status
+is 1 when its time per token grows by more than --max-growth from the
+shortest to the longest text.
+
+Usage:
+    python -m benchmarks.subject_index_benchmark
+    python -m benchmarks.subject_index_benchmark --sizes 1,4,16 --max-growth 1.5
+"""
+import argparse
+import contextlib
+import sys
+import time
+
+from benchmarks.run import load_corpus
+from tests.test_subject_index import nested_scan_subjects, run_on_text
+
+
+def time_call(function, repeat=5):
+    """Best wall-clock time of ``repeat`` calls, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='1,2,4,8,16', help='Comma-separated paragraph counts per text')
+    parser.add_argument('--max-growth', type=float, default=2.0,
+                        help='Allowed growth of the time per token from the shortest to the longest text')
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    
+    with contextlib.redirect_stdout(sys.stderr):
+        from fuzzy_grammar.grammar_analyzer import GrammarAnalyzer
+        analyzer = GrammarAnalyzer()
+    
+    corpus = load_corpus()
+    
+    # Same subjects as the nested scan on every corpus text
+    for size in ('sentences', 'paragraphs', 'essays'):
+        for text, _ in corpus[size]:
+            doc = analyzer.nlp(text)
+            assert analyzer._extract_subjects(doc) == nested_scan_subjects(analyzer, doc), text
+    
+    paragraphs = [text for text, _ in corpus['paragraphs']]
+    print(f"{'paragraphs':>10} {'tokens':>8} {'nested scan (ms)':>17} {'index (ms)':>11} {'index us/token':>15}")
+    per_token = []
+    for count in sizes:
+        doc = analyzer.nlp(run_on_text(paragraphs, count))
+        assert analyzer._extract_subjects(doc) == nested_scan_subjects(analyzer, doc)
+        
+        naive_ms = time_call(lambda: nested_scan_subjects(analyzer, doc), repeat=1 if count >= 8 else 3)
+        index_ms = time_call(lambda: analyzer._extract_subjects(doc))
+        per_token.append(index_ms * 1000 / len(doc))
+        print(f"{count:>10} {len(doc):>8} {naive_ms:>17.2f} {index_ms:>11.3f} {per_token[-1]:>15.3f}")
+    
+    growth = per_token[-1] / per_token[0]
+    print(f"Time per token grew {growth:.2f}x from {sizes[0]} to {sizes[-1]} paragraphs")
+    if growth > args.max_growth:
+        print(f"Subject extraction is not linear (allowed growth {args.max_growth:.2f}x)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""
+Benchmark the tense pattern index against the old sliding-window scan
+
+Generates synthetic tenses with an increasing number of patterns and times
+both approaches on the same text. The index should stay flat as the number
+of patterns grows while the sliding window grows linearly.
+
+Usage:
+    python -m benchmarks.tense_index_benchmark
+"""
+import random
+import time
+
+from fuzzy_grammar.tense_index import TensePatternIndex
+
+SUBJECTS = ['I', 'you', 'he', 'she', 'it', 'we', 'they']
+AUXILIARIES = ['have', 'has', 'had', 'will', 'would', 'was', 'were', 'is', 'are', 'am']
+
+
+def make_patterns(count, rng):
+    """Create ``count`` distinct two- to four-word error patterns"""
+    verbs = [f'verb{i}' for i in range(max(1, count // 10))]
+    patterns = {}
+    while len(patterns) < count:
+        words = [rng.choice(SUBJECTS), rng.choice(AUXILIARIES)]
+        words += [rng.choice(verbs)] * rng.randint(0, 2)
+        patterns[' '.join(words)] = 'correction'
+    return patterns
+
+
+def sliding_window(patterns, text):
+    """The pattern-by-pattern scan the index replaces"""
+    hits = []
+    text_words = text.lower().split()
+    for error_pattern in patterns:
+        pattern_words = error_pattern.lower().split()
+        for i in range(len(text_words) - len(pattern_words) + 1):
+            if all(text_words[i + j] == pattern_words[j] for j in range(len(pattern_words))):
+                hits.append((i, len(pattern_words)))
+    return hits
+
+
+def time_call(function, repeat=5):
+    """Best wall-clock time of ``repeat`` calls, in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    rng = random.Random(42)
+    text = ' '.join(rng.choice(SUBJECTS + AUXILIARIES + ['go', 'the', 'school', 'verb1']) for _ in range(500))
+    
+    print(f"{'patterns':>10} {'sliding window (ms)':>20} {'index (ms)':>12}")
+    for count in (10, 100, 1000, 5000):
+        patterns = make_patterns(count, rng)
+        index = TensePatternIndex({'Synthetic': patterns})
+        words = text.lower().split()
+        
+        assert sorted(sliding_window(patterns, text)) == sorted((s, l) for s, l, _ in index.find('Synthetic', words))
+        
+        naive_ms = time_call(lambda: sliding_window(patterns, text), repeat=1 if count >= 1000 else 5)
+        index_ms = time_call(lambda: index.find('Synthetic', words))
+        print(f"{count:>10} {naive_ms:>20.2f} {index_ms:>12.3f}")
+
+
+if __name__ == '__main__':
+    main()
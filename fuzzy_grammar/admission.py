@@ -0,0 +1,194 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import metrics
+
+
+QUEUE_DEPTH = metrics.REGISTRY.gauge(
+    'grammar_admission_queue_depth',
+    'Admitted requests waiting for a worker',
+    ('queue',))
+
+IN_FLIGHT = metrics.REGISTRY.gauge(
+    'grammar_admission_in_flight',
+    'Requests being processed by a worker',
+    ('queue',))
+
+WAIT_SECONDS = metrics.REGISTRY.histogram(
+    'grammar_admission_wait_seconds',
+    'Time admitted requests spent waiting for a worker',
+    ('queue',))
+
+REJECTED = metrics.REGISTRY.counter(
+    'grammar_admission_rejected_total',
+    'Requests shed by admission control, by reason (queue_full, queue_timeout)',
+    ('queue', 'reason'))
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of being processed"""
+    
+    def __init__(self, reason, retry_after):
+        """
+        Args:
+            reason (str): 'queue_full' (rejected on arrival) or 'queue_timeout'
+                (waited longer than the queue allows)
+            retry_after (int): Seconds the client should wait before retrying
+        """
+        super().__init__(f"Server overloaded ({reason}), retry after {retry_after}s")
+        self.reason = reason
+        self.retry_after = retry_after
+        # Too many requests on arrival; service unavailable once queued work expires
+        self.status = 429 if reason == 'queue_full' else 503
+
+
+class AdmissionQueue:
+    """
+    Bounded admission in front of a fixed-size worker pool
+    
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a worker; anything beyond that is rejected immediately with
+    Overloaded instead of growing an unbounded backlog. Jobs that waited
+    longer than ``max_wait`` seconds are dropped before they start, so
+    admitted requests see a bounded queueing delay under overload.
+    """
+    
+    def __init__(self, max_workers=4, max_queue=16, max_wait=None, name='analyze'):
+        """
+        Args:
+            max_workers (int): Jobs processed concurrently
+            max_queue (int): Jobs allowed to wait for a worker
+            max_wait (float, optional): Seconds a job may wait before it is dropped
+            name (str): Queue name used in metric labels and thread names
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.name = name
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'{name}-worker')
+        
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        # Moving average of the job duration, used for Retry-After
+        self._service_seconds = None
+        
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+    
+    def retry_after(self):
+        """
+        Estimate how long the current backlog takes to drain
+        
+        Returns:
+            int: Seconds (at least 1)
+        """
+        with self._lock:
+            backlog = self._queued + self._running
+            service = self._service_seconds or 1.0
+        return max(1, math.ceil(backlog * service / self.max_workers))
+    
+    def submit(self, function, *args, **kwargs):
+        """
+        Queue a job for a worker
+        
+        Args:
+            function (callable): Job to run
+            *args, **kwargs: Passed to ``function``
+        
+        Returns:
+            Future: Resolves to the job's result, or raises Overloaded if the
+                job waited longer than ``max_wait``
+        
+        Raises:
+            Overloaded: If the queue is full
+        """
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                full = True
+            else:
+                self._queued += 1
+                self.admitted += 1
+                full = False
+        
+        if full:
+            REJECTED.inc(self.name, 'queue_full')
+            raise Overloaded('queue_full', self.retry_after())
+        
+        QUEUE_DEPTH.inc(self.name)
+        submitted = time.perf_counter()
+        
+        def job():
+            started = time.perf_counter()
+            waited = started - submitted
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            QUEUE_DEPTH.dec(self.name)
+            IN_FLIGHT.inc(self.name)
+            WAIT_SECONDS.observe(waited, self.name)
+            
+            ran = False
+            try:
+                if self.max_wait is not None and waited > self.max_wait:
+                    with self._lock:
+                        self.expired += 1
+                    REJECTED.inc(self.name, 'queue_timeout')
+                    raise Overloaded('queue_timeout', self.retry_after())
+                
+                ran = True
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._running -= 1
+                    if ran:
+                        previous = self._service_seconds
+                        self._service_seconds = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+                IN_FLIGHT.dec(self.name)
+        
+        try:
+            return self.executor.submit(job)
+        except RuntimeError:
+            # Executor shut down: undo the admission
+            with self._lock:
+                self._queued -= 1
+            QUEUE_DEPTH.dec(self.name)
+            raise
+    
+    def run(self, function, *args, **kwargs):
+        """
+        Run a job on a worker and wait for its result
+        
+        Raises:
+            Overloaded: If the job was rejected or expired in the queue
+        """
+        return self.submit(function, *args, **kwargs).result()
+    
+    def stats(self):
+        """
+        Report the queue occupancy and counters
+        
+        Returns:
+            dict: Limits, current depth, in-flight jobs and admission counters
+        """
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_queue': self.max_queue,
+                'max_wait': self.max_wait,
+                'queued': self._queued,
+                'running': self._running,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'expired': self.expired,
+                'mean_service_seconds': self._service_seconds
+            }
+    
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and release the workers"""
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,62 @@
+import time
+
+from . import metrics
+
+
+DEADLINE_SKIPS = metrics.REGISTRY.counter(
+    'grammar_deadline_skips_total',
+    'Analysis steps skipped because the request ran out of time budget',
+    ('step',))
+
+
+class Deadline:
+    """
+    Time budget of a single request
+    
+    The analyzer asks allows() before each optional stage and detector
+    family; once the budget is spent, the remaining steps are skipped and
+    recorded in ``skipped`` so the result can be flagged as truncated. A step
+    that has started is never interrupted, so a request can overrun the
+    budget by at most one step.
+    """
+    
+    def __init__(self, budget_ms, started=None):
+        """
+        Args:
+            budget_ms (float): Time budget in milliseconds
+            started (float, optional): time.perf_counter() value the budget
+                counts from; defaults to now
+        """
+        self.budget_ms = budget_ms
+        self.started = time.perf_counter() if started is None else started
+        self.expires = self.started + budget_ms / 1000.0
+        self.skipped = []
+    
+    def remaining_ms(self):
+        """Milliseconds left in the budget (negative once it is spent)"""
+        return (self.expires - time.perf_counter()) * 1000.0
+    
+    def expired(self):
+        """Whether the budget is spent"""
+        return time.perf_counter() >= self.expires
+    
+    def allows(self, step):
+        """
+        Check whether an optional step may still run
+        
+        Args:
+            step (str): Name of the stage or detector family
+        
+        Returns:
+            bool: True if there is budget left; otherwise the step is recorded as skipped
+        """
+        if time.perf_counter() < self.expires:
+            return True
+        self.skipped.append(step)
+        DEADLINE_SKIPS.inc(step)
+        return False
+    
+    @property
+    def truncated(self):
+        """Whether any step was skipped"""
+        return bool(self.skipped)
@@ -0,0 +1,102 @@
+import numpy as np
+from spacy.attrs import POS, LOWER, SENT_START, LENGTH
+from spacy.strings import get_string_id
+from spacy.symbols import VERB
+
+
+# Words that open a subordinate clause (simplified approximation)
+SUBORDINATE_MARKERS = ('although', 'though', 'because', 'since', 'when', 'while', 'if', 'unless')
+
+
+class DocFeatures:
+    """
+    Per-token columns of a document as NumPy arrays
+    
+    One Doc.to_array call extracts the part of speech, lowercase hash,
+    sentence start and length of every token. Document metrics (sentence
+    and subordinate counts, sentence fragments, complexity indicators) are
+    then computed on the
+    arrays instead of separate Python passes over the tokens. The stages
+    analyzing one document share its extraction through TokenView.features.
+    """
+    
+    COLUMNS = (POS, LOWER, SENT_START, LENGTH)
+    
+    def __init__(self, doc):
+        """
+        Args:
+            doc: spaCy Doc object
+        """
+        self.doc = doc
+        self.has_sentences = doc.has_annotation("SENT_START")
+        
+        columns = doc.to_array(list(self.COLUMNS)).reshape(len(doc), len(self.COLUMNS))
+        self.pos = columns[:, 0]
+        self.lower = columns[:, 1]
+        # SENT_START is 1, -1 or 0 (unknown); the array is unsigned, so compare with 1
+        self.sent_start = columns[:, 2] == 1
+        self.length = columns[:, 3]
+        
+        self._sentence_starts = None
+    
+    def __len__(self):
+        return len(self.pos)
+    
+    def sentence_starts(self):
+        """
+        Token index of the first token of every sentence, as doc.sents splits them
+        
+        Raises:
+            ValueError: If the document has no sentence boundaries
+        """
+        if not self.has_sentences:
+            raise ValueError("sentence boundaries are not set on the document")
+        if self._sentence_starts is None:
+            starts = np.flatnonzero(self.sent_start)
+            if len(self) and (not len(starts) or starts[0] != 0):
+                starts = np.concatenate(([0], starts))
+            self._sentence_starts = starts
+        return self._sentence_starts
+    
+    def sentence_count(self):
+        """Number of sentences"""
+        return len(self.sentence_starts())
+    
+    def count_words(self, words):
+        """Number of tokens whose lowercase form is one of ``words``"""
+        hashes = np.array([get_string_id(word) for word in words], dtype=self.lower.dtype)
+        return int(np.count_nonzero(np.isin(self.lower, hashes)))
+    
+    def fragments(self, min_tokens=4):
+        """
+        Sentences without any verb
+        
+        Args:
+            min_tokens (int): Shorter sentences are not reported
+        
+        Returns:
+            list: (start, end) token indices of every fragment, in document order
+        """
+        starts = self.sentence_starts()
+        if not len(starts):
+            return []
+        ends = np.append(starts[1:], len(self))
+        verbs = np.add.reduceat((self.pos == VERB).astype(np.int64), starts)
+        mask = (verbs == 0) & (ends - starts >= min_tokens)
+        return [(int(start), int(end)) for start, end in zip(starts[mask], ends[mask])]
+    
+    def complexity_partials(self):
+        """
+        Additive complexity indicators of the document
+        
+        Returns:
+            dict: token_chars, tokens, sentence_tokens, sentences and subordinates
+        """
+        return {
+            'token_chars': int(self.length.sum()),
+            'tokens': len(self),
+            # Sentences partition the document
+            'sentence_tokens': len(self),
+            'sentences': self.sentence_count(),
+            'subordinates': self.count_words(SUBORDINATE_MARKERS)
+        }
@@ -0,0 +1,125 @@
+from bisect import bisect_left
+
+
+# Dependency labels of a verb's subject
+SUBJECT_DEPS = ('nsubj', 'nsubjpass')
+
+# Parts of speech that can be (part of) a subject
+NOMINAL_POS = ('NOUN', 'PROPN', 'PRON')
+
+# Dependency labels that rule a nominal out as a positional subject
+OBJECT_DEPS = ('dobj', 'pobj')
+
+# Tokens before a positional subject searched for "X, Y and Z" lists
+CANDIDATE_LIST_WINDOW = 5
+
+
+class DocIndex:
+    """
+    Per-document lookup tables for subject extraction
+    
+    Built in one pass over the tokens: children by dependency label,
+    the positions of list separators (',' and 'and'), the next nominal
+    after every position and the positional subject candidates with their
+    comma/'and' lists. Subject extraction can then answer each of its
+    questions in constant or logarithmic time instead of rescanning the
+    document for every verb.
+    """
+    
+    def __init__(self, doc):
+        """
+        Args:
+            doc: spaCy Doc object
+        """
+        self.doc = doc
+        length = len(doc)
+        
+        # (head index, dependency label) -> child indices in document order
+        self._children = {}
+        self.separators = []
+        nominal = [False] * length
+        candidate = [False] * length
+        
+        for token in doc:
+            self._children.setdefault((token.head.i, token.dep_), []).append(token.i)
+            if token.text == ',' or token.text.lower() == 'and':
+                self.separators.append(token.i)
+            if token.pos_ in NOMINAL_POS:
+                nominal[token.i] = True
+                candidate[token.i] = token.dep_ not in OBJECT_DEPS
+        
+        # Index of the first nominal at or after each position (length if none)
+        self._next_nominal = [length] * (length + 1)
+        for i in range(length - 1, -1, -1):
+            self._next_nominal[i] = i if nominal[i] else self._next_nominal[i + 1]
+        
+        # Index of the last candidate before each position (None if none)
+        self._last_candidate = [None] * (length + 1)
+        
+        # Nominals listed before each candidate, concatenated over the
+        # candidates in document order, and where each candidate's share ends
+        self.candidate_compounds = []
+        self._compounds_end = {}
+        self._list_start = {}
+        separator = set(self.separators)
+        
+        for i in range(length):
+            self._last_candidate[i + 1] = i if candidate[i] else self._last_candidate[i]
+            if not candidate[i]:
+                continue
+            
+            start = i
+            for k in range(max(0, i - CANDIDATE_LIST_WINDOW), i):
+                if k in separator:
+                    for j in range(k + 1, i):
+                        if nominal[j]:
+                            self.candidate_compounds.append(doc[j].text)
+                            start = min(start, j)
+            self._compounds_end[i] = len(self.candidate_compounds)
+            self._list_start[i] = start
+    
+    def children(self, head, label):
+        """Indices of the children of token ``head`` attached with ``label``"""
+        return self._children.get((head, label), ())
+    
+    def first_child(self, head, labels):
+        """Index of the first child of token ``head`` with any of ``labels``, or None"""
+        firsts = [self._children[(head, label)][0] for label in labels if (head, label) in self._children]
+        return min(firsts) if firsts else None
+    
+    def separators_between(self, start, stop):
+        """Indices of the ',' and 'and' tokens in [start, stop)"""
+        if start >= stop:
+            return []
+        return self.separators[bisect_left(self.separators, start):bisect_left(self.separators, stop)]
+    
+    def next_nominal(self, start, stop):
+        """Index of the first noun, proper noun or pronoun in [start, stop), or None"""
+        if start >= stop:
+            return None
+        j = self._next_nominal[min(start, len(self.doc))]
+        return j if j < stop else None
+    
+    def last_candidate(self, stop):
+        """
+        Index of the last positional subject candidate before ``stop``
+        
+        Candidates are nouns, proper nouns and pronouns that are not objects.
+        """
+        return self._last_candidate[min(stop, len(self.doc))]
+    
+    def compounds_through(self, candidate):
+        """
+        Nominals listed before every candidate up to and including ``candidate``
+        
+        Returns offsets rather than the list itself, so looking a candidate up
+        stays constant-time; the texts are ``candidate_compounds[:end]``.
+        
+        Args:
+            candidate (int): Index of a positional subject candidate
+        
+        Returns:
+            tuple: (end of the listed nominals in ``candidate_compounds``, index
+                where the candidate's own list starts)
+        """
+        return self._compounds_end[candidate], self._list_start[candidate]
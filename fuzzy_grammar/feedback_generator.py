@@ -1,3 +1,7 @@
+import random
+from . import metrics
+
+
 class FeedbackGenerator:
     """
     Generates personalized feedback based on grammar analysis results
@@ -201,7 +205,8 @@ class FeedbackGenerator:
             ]
         }
     
-    def generate_feedback(self, analysis_result, fuzzy_result, tense=None):
+    @metrics.STAGE_SECONDS.time('feedback')
+    def generate_feedback(self, analysis_result, fuzzy_result, tense=None, seed=None):
         """
         Generate personalized feedback based on analysis results
         
@@ -209,6 +214,9 @@ class FeedbackGenerator:
             analysis_result (dict): Result from the grammar analyzer
             fuzzy_result (dict): Result from the fuzzy inference system
             tense (str, optional): The specific tense being analyzed
+            seed (optional): Seed for picking the feedback templates. The same
+                seed and inputs always produce the same feedback; None picks
+                templates at random
             
         Returns:
             dict: Personalized feedback for the user
@@ -220,14 +228,16 @@ class FeedbackGenerator:
         # Get errors
         errors = analysis_result.get('errors', [])
         
+        rng = random.Random(seed)
+        
         # Generate overall feedback based on severity
-        overall_feedback = self._generate_overall_feedback(severity_level)
+        overall_feedback = self._generate_overall_feedback(severity_level, rng)
         
         # Generate specific feedback for each error type
         specific_feedback = self._generate_specific_feedback(errors)
         
         # Generate suggestions based on errors
-        suggestions = self._generate_suggestions(errors, tense)
+        suggestions = self._generate_suggestions(errors, tense, rng)
         
         # Generate resources
         resources = self._generate_resources(errors, tense)
@@ -241,11 +251,10 @@ class FeedbackGenerator:
             'resources': resources
         }
     
-    def _generate_overall_feedback(self, severity_level):
+    def _generate_overall_feedback(self, severity_level, rng=random):
         """Generate overall feedback based on severity level"""
-        import random
         templates = self.severity_templates.get(severity_level, self.severity_templates['Medium'])
-        return random.choice(templates)
+        return rng.choice(templates)
     
     def _generate_specific_feedback(self, errors):
         """Generate specific feedback for each error type"""
@@ -278,64 +287,67 @@ class FeedbackGenerator:
         
         return feedback
     
-    def _generate_suggestions(self, errors, tense=None):
+    def _generate_suggestions(self, errors, tense=None, rng=random):
         """Generate suggestions based on errors and tense"""
-        import random
+        # Keep suggestions in the order they were added so the output is stable
+        suggestions = []
         
-        suggestions = set()
+        def add(suggestion):
+            if suggestion not in suggestions:
+                suggestions.append(suggestion)
         
-        # Get error types
-        error_types = {error['type'] for error in errors}
+        # Get error types, in order of first occurrence
+        error_types = list(dict.fromkeys(error['type'] for error in errors))
         
         # Add suggestions for each error type
         for error_type in error_types:
             if error_type in self.error_suggestions:
                 # Add a random suggestion for this error type
-                error_suggestion = random.choice(self.error_suggestions[error_type])
-                suggestions.add(error_suggestion)
+                error_suggestion = rng.choice(self.error_suggestions[error_type])
+                add(error_suggestion)
         
         # Add tense-specific suggestions if a tense was selected
         if tense:
             if "Subject-verb agreement" in error_types or "Verb form error" in error_types:
-                suggestions.add(f"Review the correct verb forms for {tense} tense.")
+                add(f"Review the correct verb forms for {tense} tense.")
             
             if tense == "Simple Present":
-                suggestions.add("Remember: Use the base form for I/you/we/they and add -s/-es for he/she/it in simple present.")
+                add("Remember: Use the base form for I/you/we/they and add -s/-es for he/she/it in simple present.")
             elif tense == "Simple Past":
-                suggestions.add("For past tense, use the past form of the verb or 'did not' + base form (not past form) for negatives.")
+                add("For past tense, use the past form of the verb or 'did not' + base form (not past form) for negatives.")
             elif tense == "Present Continuous":
-                suggestions.add("Present continuous should use am/is/are + verb-ing.")
+                add("Present continuous should use am/is/are + verb-ing.")
             elif tense == "Present Perfect":
-                suggestions.add("Present perfect uses have/has + past participle form of the verb.")
+                add("Present perfect uses have/has + past participle form of the verb.")
             elif tense == "Past Continuous":
-                suggestions.add("Past continuous uses was/were + verb-ing.")
+                add("Past continuous uses was/were + verb-ing.")
             elif tense == "Past Perfect":
-                suggestions.add("Past perfect uses had + past participle form of the verb.")
+                add("Past perfect uses had + past participle form of the verb.")
             elif tense == "Future Simple":
-                suggestions.add("Future simple uses will + base form of the verb (not -ing form).")
+                add("Future simple uses will + base form of the verb (not -ing form).")
             elif tense == "Future Continuous":
-                suggestions.add("Future continuous uses will be + verb-ing.")
+                add("Future continuous uses will be + verb-ing.")
             elif tense == "Future Perfect":
-                suggestions.add("Future perfect uses will have + past participle form of the verb.")
+                add("Future perfect uses will have + past participle form of the verb.")
                 
         # Special handling for common error combinations
         if "Modal verb error" in error_types and "Verb form error" in error_types:
-            suggestions.add("Remember that modal verbs (can, must, should) are followed directly by the base verb without 'to'.")
+            add("Remember that modal verbs (can, must, should) are followed directly by the base verb without 'to'.")
             
-        if "Irregular verb error" in error_types and "Simple Past" in tense:
-            suggestions.add("Pay special attention to irregular past tense forms - they don't follow the -ed pattern.")
+        if "Irregular verb error" in error_types and tense and "Simple Past" in tense:
+            add("Pay special attention to irregular past tense forms - they don't follow the -ed pattern.")
             
         if "Article with noun error" in error_types and "Missing article/determiner" in error_types:
-            suggestions.add("Review when to use articles (a, an, the) and when to omit them with different types of nouns.")
+            add("Review when to use articles (a, an, the) and when to omit them with different types of nouns.")
         
-        return list(suggestions)
+        return suggestions
     
     def _generate_resources(self, errors, tense=None):
         """Generate resources based on errors and tense"""
         resources = []
         
-        # Get unique error types
-        error_types = {error['type'] for error in errors}
+        # Get unique error types, in order of first occurrence
+        error_types = dict.fromkeys(error['type'] for error in errors)
         
         # Add resources for each error type
         for error_type in error_types:
@@ -1,6 +1,10 @@
+import os
+import hashlib
+import threading
 import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
+from . import metrics
 
 class FuzzyGrammarSystem:
     """
@@ -11,10 +15,24 @@ class FuzzyGrammarSystem:
     - Grammar match score
     - Error frequency
     - Sentence complexity
+    
+    evaluate() is stateless: it never touches the shared scikit-fuzzy
+    simulator, so a single instance can be used from many threads at once.
+    
+    In compiled mode the severity surface is sampled once on a regular grid
+    over the three 0-100 inputs and each evaluation becomes a trilinear
+    interpolation in that table instead of a full Mamdani inference.
     """
     
-    def __init__(self):
-        """Initialize the fuzzy inference system with variables and rules"""
+    def __init__(self, compiled=False, table_path=None, table_step=5):
+        """
+        Initialize the fuzzy inference system with variables and rules
+        
+        Args:
+            compiled (bool): Answer evaluations from a precomputed severity table
+            table_path (str, optional): .npy file used to cache the compiled table
+            table_step (int): Grid spacing of the compiled table (must divide 100)
+        """
         # Define fuzzy variables
         self.grammar_score = ctrl.Antecedent(np.arange(0, 101, 1), 'grammar_match')
         self.error_frequency = ctrl.Antecedent(np.arange(0, 101, 1), 'error_frequency')
@@ -59,14 +77,167 @@ class FuzzyGrammarSystem:
             ctrl.Rule(self.grammar_score['medium'] & self.complexity['high'], self.severity['medium'])
         ]
         
+        # Keep the rules around so the batch evaluator can walk them
+        self.rules = rules
+        
         # Create control system
+        # The simulator keeps per-run state on the shared terms, so it is only
+        # used for introspection and reference runs guarded by _engine_lock
         self.grammar_ctrl = ctrl.ControlSystem(rules)
         self.grammar_simulator = ctrl.ControlSystemSimulation(self.grammar_ctrl)
+        self._engine_lock = threading.Lock()
+        
+        # Compiled severity table (filled in by compile())
+        self.compiled = False
+        self.severity_table = None
+        self.table_step = table_step
+        self.table_fingerprint = None
+        self.table_max_deviation = None
+        
+        if compiled:
+            self.compile(table_path, table_step)
+    
+    def compile(self, table_path=None, table_step=5, validation_points=500):
+        """
+        Build (or load) the dense severity table used by compiled mode
+        
+        A cached table is only loaded if the fingerprint saved next to it
+        (``<table_path>.fingerprint``) matches the current rules, membership
+        functions and grid step; otherwise it is rebuilt and overwritten.
+        
+        Args:
+            table_path (str, optional): .npy file to load the table from, or to
+                save it to after building
+            table_step (int): Grid spacing of the table (must divide 100)
+            validation_points (int): Random inputs used to measure the deviation
+                of the interpolated table from the exact engine
+        
+        Returns:
+            float: Maximum absolute deviation from the exact engine on the
+                validation points
+        """
+        if table_step <= 0 or 100 % table_step != 0:
+            raise ValueError("table_step must be a positive divisor of 100")
+        
+        size = 100 // table_step + 1
+        fingerprint = self._table_fingerprint(table_step)
+        fingerprint_path = f"{table_path}.fingerprint" if table_path else None
+        table = None
+        
+        if table_path and os.path.exists(table_path):
+            try:
+                saved = None
+                if os.path.exists(fingerprint_path):
+                    with open(fingerprint_path, encoding='utf-8') as f:
+                        saved = f.read().strip()
+                if saved != fingerprint:
+                    print(f"Ignoring severity table {table_path}: built for different rules or step")
+                else:
+                    table = np.load(table_path)
+                    if table.shape != (size, size, size):
+                        print(f"Ignoring severity table {table_path}: shape {table.shape} does not match step {table_step}")
+                        table = None
+            except Exception as e:
+                print(f"Error loading severity table {table_path}: {e}")
+                table = None
+        
+        if table is None:
+            grid = np.linspace(0, 100, size)
+            g, e, c = np.meshgrid(grid, grid, grid, indexing='ij')
+            table = self.evaluate_batch(g.ravel(), e.ravel(), c.ravel())['severity_score'].reshape(size, size, size)
+            
+            if table_path:
+                try:
+                    np.save(table_path, table)
+                    with open(fingerprint_path, 'w', encoding='utf-8') as f:
+                        f.write(fingerprint + '\n')
+                except Exception as e:
+                    print(f"Error saving severity table {table_path}: {e}")
+        
+        self.severity_table = table
+        self.table_step = table_step
+        self.table_fingerprint = fingerprint
+        self.compiled = True
+        
+        # Measure how far the interpolated surface strays from the exact engine
+        rng = np.random.default_rng(0)
+        samples = rng.uniform(0, 100, size=(validation_points, 3))
+        exact = self._compute_exact(samples[:, 0], samples[:, 1], samples[:, 2])
+        approx = np.array([self._lookup_severity(*point) for point in samples])
+        self.table_max_deviation = float(np.max(np.abs(exact - approx)))
+        
+        return self.table_max_deviation
+    
+    def _table_fingerprint(self, table_step):
+        """
+        Fingerprint everything the compiled table depends on
+        
+        Covers the universes and membership functions of all variables, the
+        rules with their weights and operators, the aggregation and
+        defuzzification methods and the grid step.
+        
+        Returns:
+            str: Hex digest
+        """
+        digest = hashlib.sha256()
+        
+        def feed(*parts):
+            digest.update(repr(parts).encode('utf-8'))
+        
+        feed(table_step)
+        for variable in (self.grammar_score, self.error_frequency, self.complexity, self.severity):
+            feed(variable.label, variable.universe.tolist())
+            for label, term in variable.terms.items():
+                feed(label, np.asarray(term.mf, dtype=float).tolist())
+        feed(self.severity.defuzzify_method, getattr(self.severity.accumulation_method, '__name__', None))
+        for rule in self.rules:
+            feed(str(rule.antecedent), [(str(weighted.term), weighted.weight) for weighted in rule.consequent],
+                 getattr(rule.and_func, '__name__', None), getattr(rule.or_func, '__name__', None))
+        
+        return digest.hexdigest()
+    
+    def _compute_exact(self, grammar_match, error_frequency, complexity):
+        """Run the scikit-fuzzy engine on arrays of inputs using a private simulator"""
+        with self._engine_lock:
+            simulator = ctrl.ControlSystemSimulation(self.grammar_ctrl)
+            simulator.input['grammar_match'] = np.asarray(grammar_match, dtype=float)
+            simulator.input['error_frequency'] = np.asarray(error_frequency, dtype=float)
+            simulator.input['complexity'] = np.asarray(complexity, dtype=float)
+            simulator.compute()
+            return np.asarray(simulator.output['severity'], dtype=float)
+    
+    def _lookup_severity(self, grammar_match, error_frequency, complexity):
+        """Trilinear interpolation of the severity score in the compiled table"""
+        table = self.severity_table
+        last = table.shape[0] - 1
+        step = self.table_step
         
+        # Map each input onto the grid: integer cell index plus offset within the cell
+        coords = []
+        for value in (grammar_match, error_frequency, complexity):
+            position = min(max(float(value), 0.0), 100.0) / step
+            index = min(int(position), last - 1)
+            coords.append((index, position - index))
+        
+        (i, x), (j, y), (k, z) = coords
+        
+        c00 = table[i, j, k] * (1 - x) + table[i + 1, j, k] * x
+        c01 = table[i, j, k + 1] * (1 - x) + table[i + 1, j, k + 1] * x
+        c10 = table[i, j + 1, k] * (1 - x) + table[i + 1, j + 1, k] * x
+        c11 = table[i, j + 1, k + 1] * (1 - x) + table[i + 1, j + 1, k + 1] * x
+        
+        c0 = c00 * (1 - y) + c10 * y
+        c1 = c01 * (1 - y) + c11 * y
+        
+        return float(c0 * (1 - z) + c1 * z)
+
+    @metrics.STAGE_SECONDS.time('fuzzy')
     def evaluate(self, grammar_match, error_frequency, complexity):
         """
         Evaluate the grammar quality using fuzzy inference
         
+        Safe to call concurrently: all intermediate values live in local arrays.
+        
         Args:
             grammar_match (float): Score from 0-100 indicating grammar correctness
             error_frequency (float): Score from 0-100 indicating frequency of errors
@@ -75,16 +246,18 @@ class FuzzyGrammarSystem:
         Returns:
             dict: Results of the fuzzy inference, including the severity score and level
         """
-        # Input values to the fuzzy system
-        self.grammar_simulator.input['grammar_match'] = grammar_match
-        self.grammar_simulator.input['error_frequency'] = error_frequency
-        self.grammar_simulator.input['complexity'] = complexity
-        
-        # Compute result
-        self.grammar_simulator.compute()
+        if self.compiled:
+            severity_score = self._lookup_severity(grammar_match, error_frequency, complexity)
+            return {
+                'severity_score': severity_score,
+                'severity_level': self._get_severity_level(severity_score)
+            }
         
-        # Get the defuzzified output
-        severity_score = self.grammar_simulator.output['severity']
+        # Run the stateless Mamdani inference on a batch of one
+        severity_score = float(self._mamdani_batch(
+            np.array([grammar_match], dtype=float),
+            np.array([error_frequency], dtype=float),
+            np.array([complexity], dtype=float))[0])
         
         # Determine severity level
         severity_level = self._get_severity_level(severity_score)
@@ -95,6 +268,135 @@ class FuzzyGrammarSystem:
             'severity_level': severity_level
         }
     
+    @metrics.STAGE_SECONDS.time('fuzzy_batch')
+    def evaluate_batch(self, grammar_match, error_frequency, complexity, chunk_size=4096):
+        """
+        Evaluate many inputs at once using array operations
+        
+        Memberships, rule firing strengths, aggregation and centroid
+        defuzzification are computed for the whole batch with NumPy, following
+        the same Mamdani steps as scikit-fuzzy, so every element matches
+        evaluate() and the scikit-fuzzy simulator.
+        
+        Args:
+            grammar_match (array-like): Grammar match scores (0-100)
+            error_frequency (array-like): Error frequency scores (0-100)
+            complexity (array-like): Complexity scores (0-100)
+            chunk_size (int): Number of items processed per vectorized step
+        
+        Returns:
+            dict: 'severity_score' (float array) and 'severity_level' (str array)
+        """
+        grammar_match = np.asarray(grammar_match, dtype=float).ravel()
+        error_frequency = np.asarray(error_frequency, dtype=float).ravel()
+        complexity = np.asarray(complexity, dtype=float).ravel()
+        
+        if not (len(grammar_match) == len(error_frequency) == len(complexity)):
+            raise ValueError("All input arrays must have the same length")
+        
+        scores = np.empty(len(grammar_match), dtype=float)
+        for start in range(0, len(scores), chunk_size):
+            end = start + chunk_size
+            scores[start:end] = self._mamdani_batch(
+                grammar_match[start:end], error_frequency[start:end], complexity[start:end])
+        
+        levels = np.where(scores < 40, 'Low', np.where(scores < 60, 'Medium', 'High'))
+        
+        return {
+            'severity_score': scores,
+            'severity_level': levels
+        }
+    
+    def _mamdani_batch(self, grammar_match, error_frequency, complexity):
+        """Vectorized Mamdani inference for 1-D input arrays of equal length"""
+        inputs = {
+            'grammar_match': grammar_match,
+            'error_frequency': error_frequency,
+            'complexity': complexity
+        }
+        
+        # Fuzzify: membership of every input value in every antecedent term
+        memberships = {}
+        for variable in (self.grammar_score, self.error_frequency, self.complexity):
+            for label, term in variable.terms.items():
+                memberships[(variable.label, label)] = np.interp(
+                    inputs[variable.label], variable.universe, term.mf)
+        
+        # Rule activation, accumulated per consequent term with max
+        cuts = {}
+        for rule in self.rules:
+            firing = self._batch_antecedent(rule.antecedent, memberships, rule)
+            for weighted in rule.consequent:
+                activation = firing * weighted.weight
+                label = weighted.term.label
+                cuts[label] = activation if label not in cuts else \
+                    self.severity.accumulation_method(activation, cuts[label])
+        
+        # Upsample the output universe with the points where each cut meets its
+        # membership function, exactly as scikit-fuzzy does before defuzzifying
+        universe = self.severity.universe.astype(float)
+        extra_points = []
+        for label, cut in cuts.items():
+            mf = self.severity[label].mf
+            level = cut[:, None]
+            above = np.where(level == 0, mf > level, mf >= level)
+            crossing = above[:, 1:] != above[:, :-1]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                points = universe[:-1] + (level - mf[:-1]) * np.diff(universe) / np.diff(mf)
+            extra_points.append(np.where(crossing, points, np.nan))
+        
+        x = np.concatenate([np.broadcast_to(universe, (len(grammar_match), len(universe)))] + extra_points, axis=1)
+        x.sort(axis=1)
+        
+        # Aggregate the clipped output terms
+        output_mf = np.zeros_like(x)
+        for label, cut in cuts.items():
+            upsampled = np.interp(x, universe, self.severity[label].mf)
+            np.maximum(output_mf, np.minimum(cut[:, None], upsampled), out=output_mf)
+        
+        return self._batch_centroid(x, output_mf)
+    
+    def _batch_antecedent(self, antecedent, memberships, rule):
+        """Firing strength of a rule antecedent for every item in the batch"""
+        if isinstance(antecedent, ctrl.term.TermAggregate):
+            first = self._batch_antecedent(antecedent.term1, memberships, rule)
+            if antecedent.kind == 'not':
+                return 1. - first
+            second = self._batch_antecedent(antecedent.term2, memberships, rule)
+            if antecedent.kind == 'and':
+                return rule.and_func(first, second)
+            return rule.or_func(first, second)
+        return memberships[(antecedent.parent.label, antecedent.label)]
+    
+    def _batch_centroid(self, x, mfx):
+        """Row-wise piecewise-linear centroid, matching skfuzzy.defuzzify.centroid"""
+        x1, x2 = x[:, :-1], x[:, 1:]
+        y1, y2 = mfx[:, :-1], mfx[:, 1:]
+        width = x2 - x1
+        
+        # Padding (NaN), duplicated points and zero-height segments contribute nothing
+        valid = ~(np.isnan(x2) | (width == 0) | ((y1 == 0) & (y2 == 0)))
+        width = np.where(valid, width, 0.)
+        y1 = np.where(valid, y1, 0.)
+        y2 = np.where(valid, y2, 0.)
+        x1 = np.where(valid, x1, 0.)
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            moment = np.where(
+                y1 == y2, 0.5 * width,
+                np.where(y1 == 0, 2. / 3. * width,
+                         np.where(y2 == 0, 1. / 3. * width,
+                                  2. / 3. * width * (y2 + 0.5 * y1) / (y1 + y2)))) + x1
+        area = np.where(
+            y1 == y2, width * y1,
+            np.where(y1 == 0, 0.5 * width * y2,
+                     np.where(y2 == 0, 0.5 * width * y1, 0.5 * width * (y1 + y2))))
+        
+        sum_moment_area = np.sum(np.where(valid, moment * area, 0.), axis=1)
+        sum_area = np.sum(area, axis=1)
+        
+        return sum_moment_area / np.fmax(sum_area, np.finfo(float).eps)
+    
     def _get_severity_level(self, severity_score):
         """Convert numerical severity score to linguistic level"""
         if severity_score < 40:
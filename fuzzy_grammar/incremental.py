@@ -0,0 +1,162 @@
+import copy
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+
+# Sentence end punctuation (plus closing quotes/brackets) followed by whitespace, or a line break
+_SENTENCE_BOUNDARY = re.compile(r'[.!?]+["\')\]]*(\s+)|(\n\s*)')
+
+
+def split_sentences(text):
+    """
+    Split text into sentence spans with a cheap punctuation-based splitter
+    
+    Args:
+        text (str): Text to split
+    
+    Returns:
+        list: (start, end) character offsets of each non-empty sentence
+    """
+    spans = []
+    start = 0
+    for boundary in _SENTENCE_BOUNDARY.finditer(text):
+        gap = 1 if boundary.group(1) is not None else 2
+        end = boundary.start(gap)
+        if text[start:end].strip():
+            spans.append((start, end))
+        start = boundary.end(gap)
+    if text[start:].strip():
+        spans.append((start, len(text.rstrip())))
+    return spans
+
+
+def shift_partial(partial, char_offset, token_offset):
+    """
+    Copy a piece's partial result with offsets relative to the whole text
+    
+    Args:
+        partial (dict): Result of GrammarAnalyzer._analyze_partial() for the piece
+        char_offset (int): Character offset of the piece in the whole text
+        token_offset (int): Number of tokens in the pieces before it
+    
+    Returns:
+        dict: Shifted copy of ``partial``
+    """
+    shifted = copy.deepcopy(partial)
+    for error in shifted['errors']:
+        if error.get('start') is not None:
+            error['start'] += char_offset
+            error['end'] += char_offset
+    for subject in shifted['subjects']:
+        subject['position'] += token_offset
+        if subject.get('start') is not None:
+            subject['start'] += char_offset
+            subject['end'] += char_offset
+    return shifted
+
+
+class IncrementalAnalyzer:
+    """
+    Sentence-level incremental analysis on top of a GrammarAnalyzer
+    
+    The text is split into sentences and each sentence's rule results are
+    cached by content (and tense and rule-set version). Re-submitting an
+    edited essay only parses and checks the sentences that changed; the
+    document metrics are recombined from the cached per-sentence partials.
+    
+    Rules only see one sentence at a time, and sentence boundaries come from
+    a punctuation splitter instead of spaCy's parser, so the results can
+    differ slightly from GrammarAnalyzer.analyze() on the whole text.
+    """
+    
+    def __init__(self, analyzer, max_sentences=4096):
+        """
+        Args:
+            analyzer (GrammarAnalyzer): Analyzer used for the per-sentence checks
+            max_sentences (int): Maximum number of cached sentence results
+        """
+        self.analyzer = analyzer
+        self.max_sentences = max_sentences
+        
+        # key -> partial result with offsets relative to the sentence
+        self._sentences = OrderedDict()
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+    
+    def _sentence_key(self, sentence, tense):
+        """Cache key of a sentence's partial result"""
+        payload = '\0'.join([self.analyzer.ruleset_version, tense or '', sentence])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _sentence_partial(self, sentence, tense):
+        """Return the cached partial result of a sentence, analyzing it on a miss"""
+        key = self._sentence_key(sentence, tense)
+        
+        with self._lock:
+            partial = self._sentences.get(key)
+            if partial is not None:
+                self._sentences.move_to_end(key)
+                self.hits += 1
+                return partial
+            self.misses += 1
+        
+        doc = self.analyzer._parse(sentence, self.analyzer.active_rules)
+        partial = self.analyzer._analyze_partial(doc, sentence, tense)
+        
+        with self._lock:
+            self._sentences[key] = partial
+            self._sentences.move_to_end(key)
+            while len(self._sentences) > self.max_sentences:
+                self._sentences.popitem(last=False)
+        
+        return partial
+    
+    def analyze(self, text, tense=None):
+        """
+        Analyze the text, re-checking only sentences that are not cached
+        
+        Args:
+            text (str): The English text to analyze
+            tense (str, optional): The specific tense to check against
+        
+        Returns:
+            dict: Analysis results in the same format as GrammarAnalyzer.analyze()
+        """
+        analyzer = self.analyzer
+        
+        # Validity is judged on the whole text, as in a full analysis
+        is_valid_english, non_english_reason = analyzer._is_valid_english(text)
+        if not is_valid_english:
+            return analyzer._invalid_english_result(text, non_english_reason)
+        
+        try:
+            partials = []
+            token_offset = 0
+            for start, end in split_sentences(text):
+                partial = self._sentence_partial(text[start:end], tense)
+                partials.append(shift_partial(partial, start, token_offset))
+                token_offset += partial['token_count']
+            
+            return analyzer._result_from_partials(text, partials)
+        except Exception as e:
+            print(f"Error analyzing text incrementally: {e}")
+            return analyzer._analysis_error_result(text, e)
+    
+    def stats(self):
+        """
+        Report sentence cache occupancy and counters
+        
+        Returns:
+            dict: Cached sentence count, limit, hits and misses
+        """
+        with self._lock:
+            return {
+                'entries': len(self._sentences),
+                'max_entries': self.max_sentences,
+                'hits': self.hits,
+                'misses': self.misses
+            }
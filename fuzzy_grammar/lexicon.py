@@ -0,0 +1,99 @@
+import os
+from functools import lru_cache
+
+
+# Common English contractions that should be considered valid
+ENGLISH_CONTRACTIONS = frozenset({
+    "don't", "doesn't", "didn't", "won't", "wouldn't", "can't",
+    "cannot", "couldn't", "shouldn't", "isn't", "aren't", "wasn't",
+    "weren't", "haven't", "hasn't", "hadn't", "i'm", "you're",
+    "he's", "she's", "it's", "we're", "they're", "i've", "you've",
+    "we've", "they've", "i'd", "you'd", "he'd", "she'd", "we'd",
+    "they'd", "i'll", "you'll", "he'll", "she'll", "we'll", "they'll"
+})
+
+# Word list shipped with the package, so the gate answers the same on every host
+ENGLISH_WORDS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'english_words.txt')
+
+
+class EnglishLexicon:
+    """
+    In-memory English word list with a memoized spell-checker fallback
+    
+    The word list is read once into a frozenset of lowercase words, so a
+    lookup is a hash probe instead of a call into the spell checker. Words
+    missing from the list are passed to ``fallback`` (e.g. enchant's
+    Dict.check) and the answer is kept in a bounded LRU memo.
+    
+    The word file comes from the ``word_file`` argument, the
+    ENGLISH_WORDS_FILE environment variable (an override for deployments
+    with their own list) or, by default, the list shipped in
+    ``data/english_words.txt``.
+    """
+    
+    def __init__(self, word_file=None, fallback=None, memo_size=65536):
+        """
+        Args:
+            word_file (str, optional): Path of a newline-separated word list
+            fallback (callable, optional): word -> bool check for words not in the list
+            memo_size (int): Maximum number of fallback answers remembered
+        """
+        self.word_file = word_file or os.environ.get('ENGLISH_WORDS_FILE') or ENGLISH_WORDS_FILE
+        self.words = self._load(self.word_file)
+        self.fallback = fallback
+        self._fallback_check = lru_cache(maxsize=memo_size)(self._check_fallback)
+    
+    @staticmethod
+    def _load(path):
+        """Read a word list into a frozenset of lowercase words ('#' starts a comment line)"""
+        if not path:
+            return frozenset()
+        
+        try:
+            with open(path, encoding='utf-8', errors='ignore') as f:
+                return frozenset(line.strip().lower() for line in f
+                                 if line.strip() and not line.startswith('#'))
+        except OSError as e:
+            print(f"Error loading word list {path}: {e}")
+            return frozenset()
+    
+    def _check_fallback(self, word):
+        """Ask the fallback checker about a word (memoized per instance)"""
+        try:
+            return bool(self.fallback(word))
+        except Exception as e:
+            print(f"Error checking word '{word}': {e}")
+            return False
+    
+    def check(self, word):
+        """
+        Check whether a lowercase word is English
+        
+        Args:
+            word (str): Lowercase word
+        
+        Returns:
+            bool: True if the word is in the list, is a contraction or passes the fallback
+        """
+        if word in self.words or word in ENGLISH_CONTRACTIONS:
+            return True
+        if self.fallback is None:
+            return False
+        return self._fallback_check(word)
+    
+    def memo_info(self):
+        """
+        Report the fallback memo counters
+        
+        Returns:
+            dict: Word list size and fallback memo hits, misses and size
+        """
+        info = self._fallback_check.cache_info()
+        return {
+            'words': len(self.words),
+            'word_file': self.word_file,
+            'memo_hits': info.hits,
+            'memo_misses': info.misses,
+            'memo_size': info.currsize,
+            'memo_max_size': info.maxsize
+        }
@@ -0,0 +1,298 @@
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+
+# Latency buckets in seconds, from sub-millisecond rules to slow parses
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    """Render {name="value",...} for a sample, or '' without labels"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value):
+    """Render a sample value the way Prometheus expects"""
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    
+    kind = 'counter'
+    
+    def __init__(self, name, documentation, labelnames=()):
+        """
+        Args:
+            name (str): Metric name (should end in _total)
+            documentation (str): HELP text
+            labelnames (tuple): Names of the labels, in the order values are passed
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *labels, amount=1):
+        """
+        Add to the counter
+        
+        Args:
+            *labels: Label values, in the order of ``labelnames``
+            amount (float): Increment (must not be negative)
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def value(self, *labels):
+        """Return the current value for the given label values"""
+        with self._lock:
+            return self._values.get(labels, 0)
+    
+    def samples(self):
+        """Return (suffix, labels, value) tuples for the exposition format"""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [('', _format_labels(self.labelnames, labels), value) for labels, value in items]
+
+
+class Gauge(Counter):
+    """Value that can go up and down (e.g. a queue depth)"""
+    
+    kind = 'gauge'
+    
+    def set(self, value, *labels):
+        """Set the value for the given label values"""
+        with self._lock:
+            self._values[labels] = value
+    
+    def dec(self, *labels, amount=1):
+        """Subtract from the value"""
+        self.inc(*labels, amount=-amount)
+
+
+class _Timer:
+    """Times a block or a function into a histogram; see Histogram.time()"""
+    
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.labels)
+        return False
+    
+    def __call__(self, func):
+        @wraps(func)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.histogram.observe(time.perf_counter() - started, *self.labels)
+        return timed
+
+
+class Stopwatch:
+    """
+    Times consecutive sections of one function without nesting blocks
+    
+    Each split() records the time since the previous split (or since the
+    stopwatch was created) under the given label values.
+    """
+    
+    def __init__(self, histogram, hits=None):
+        """
+        Args:
+            histogram (Histogram): Histogram receiving the section durations
+            hits (Counter, optional): Counter receiving each section's hit count
+        """
+        self.histogram = histogram
+        self.hits = hits
+        self.last = time.perf_counter()
+    
+    def split(self, *labels, hits=0):
+        """
+        Record the section that just ended
+        
+        Args:
+            *labels: Label values of the section
+            hits (int): Number of results the section produced
+        """
+        now = time.perf_counter()
+        self.histogram.observe(now - self.last, *labels)
+        if self.hits is not None and hits:
+            self.hits.inc(*labels, amount=hits)
+        self.last = now
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, as in the Prometheus data model"""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """
+        Args:
+            name (str): Metric name (e.g. ending in _seconds)
+            documentation (str): HELP text
+            labelnames (tuple): Names of the labels, in the order values are passed
+            buckets (tuple): Sorted upper bounds; +Inf is added automatically
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *labels):
+        """
+        Record one observation
+        
+        Args:
+            value (float): Observed value
+            *labels: Label values, in the order of ``labelnames``
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+    
+    def time(self, *labels):
+        """
+        Time a block (``with histogram.time('parse'):``) or a function (as a decorator)
+        
+        Args:
+            *labels: Label values of the observations
+        """
+        return _Timer(self, labels)
+    
+    def stopwatch(self, hits=None):
+        """Return a Stopwatch recording consecutive sections into this histogram"""
+        return Stopwatch(self, hits)
+    
+    def count(self, *labels):
+        """Return the number of observations for the given label values"""
+        with self._lock:
+            series = self._series.get(labels)
+            return sum(series[0]) if series else 0
+    
+    def samples(self):
+        """Return (suffix, labels, value) tuples for the exposition format"""
+        with self._lock:
+            items = sorted((labels, list(counts), total) for labels, (counts, total) in self._series.items())
+        
+        samples = []
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append(('_bucket', _format_labels(self.labelnames, labels, [('le', _format_number(bound))]),
+                                cumulative))
+            samples.append(('_sum', _format_labels(self.labelnames, labels), total))
+            samples.append(('_count', _format_labels(self.labelnames, labels), cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+    
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._metrics = {}
+        self._lock = threading.Lock()
+    
+    def _register(self, metric):
+        """Add a metric, or return the one already registered under its name"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric '{metric.name}' is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+    
+    def counter(self, name, documentation, labelnames=()):
+        """Register (or fetch) a Counter"""
+        return self._register(Counter(name, documentation, labelnames))
+    
+    def gauge(self, name, documentation, labelnames=()):
+        """Register (or fetch) a Gauge"""
+        return self._register(Gauge(name, documentation, labelnames))
+    
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Register (or fetch) a Histogram"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+    
+    def render(self):
+        """
+        Render every metric in the Prometheus text exposition format (version 0.0.4)
+        
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for suffix, labels, value in metric.samples():
+                lines.append(f'{metric.name}{suffix}{labels} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Content type of the text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Process-wide registry and the analysis metrics recorded into it
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'grammar_stage_duration_seconds',
+    'Time spent in each analysis stage (validate, parse, subjects, detect, complexity, corrections, fuzzy, feedback)',
+    ('stage',))
+
+DETECTOR_SECONDS = REGISTRY.histogram(
+    'grammar_detector_duration_seconds',
+    'Time spent in each detector family of error detection',
+    ('detector',))
+
+DETECTOR_HITS = REGISTRY.counter(
+    'grammar_detector_hits_total',
+    'Errors reported by each detector family',
+    ('detector',))
+
+ERRORS_REPORTED = REGISTRY.counter(
+    'grammar_errors_reported_total',
+    'Errors reported, by error type',
+    ('type',))
+
+FAILURES = REGISTRY.counter(
+    'grammar_failures_total',
+    'Exceptions caught (and recovered from) in each stage',
+    ('stage',))
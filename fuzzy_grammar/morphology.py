@@ -0,0 +1,167 @@
+import os
+import re
+
+
+# Verb inflections and noun number shipped with the package
+MORPHOLOGY_FILE = os.path.join(os.path.dirname(__file__), 'data', 'morphology.tsv')
+
+_VOWEL_GROUP_RE = re.compile(r'[aeiou]+')
+_CVC_END_RE = re.compile(r'[^aeiou][aeiou][^aeiouwxy]$')
+
+
+def _regular_third_person(lemma):
+    """-s form of a verb that is not in the table (watch -> watches, focus -> focuses, try -> tries)"""
+    if lemma.endswith(('o', 'ch', 'sh', 's', 'x', 'z')):
+        return lemma + 'es'
+    if len(lemma) > 1 and lemma.endswith('y') and lemma[-2] not in 'aeiou':
+        return lemma[:-1] + 'ies'
+    return lemma + 's'
+
+
+def _regular_base(form):
+    """Base form of an -s verb that is not in the table, or None if ``form`` is not one"""
+    if not form.endswith('s') or form.endswith('ss'):
+        return None
+    if form.endswith('ies') and len(form) > 3:
+        return form[:-3] + 'y'
+    if form.endswith(('shes', 'ches', 'xes', 'sses', 'zzes', 'oes')):
+        return form[:-2]
+    return form[:-1]
+
+
+def _regular_past(lemma):
+    """Past tense a learner would build with -ed (take -> taked, get -> getted)"""
+    if lemma.endswith('e'):
+        return lemma + 'd'
+    if len(lemma) > 1 and lemma.endswith('y') and lemma[-2] not in 'aeiou':
+        return lemma[:-1] + 'ied'
+    # One-syllable verbs ending consonant-vowel-consonant double the last letter
+    if len(_VOWEL_GROUP_RE.findall(lemma)) == 1 and _CVC_END_RE.search(lemma):
+        return lemma + lemma[-1] + 'ed'
+    return lemma + 'ed'
+
+
+class MorphologyLexicon:
+    """
+    Verb inflections and noun number loaded once from a tab-separated table
+    
+    The table maps each verb lemma to its third person singular, past and
+    past participle forms, and lists the irregular plurals and the singular
+    nouns that end in -s. Agreement checks and corrections are dictionary
+    lookups; only verbs missing from the table fall back to the regular
+    -s/-es/-ies spelling rules.
+    
+    Table rows (fields separated by tabs, alternatives by '|'):
+        V  lemma  3rd person singular  past  past participle   (regular verb)
+        I  lemma  3rd person singular  past  past participle   (irregular verb)
+        N  singular  plural
+        S  singular noun ending in -s
+        X  word that must not be reported as a wrong past tense
+    """
+    
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str, optional): Table to load; defaults to MORPHOLOGY_FILE
+        """
+        self.path = path or MORPHOLOGY_FILE
+        # lemma -> (3rd person singular, past forms, past participle forms)
+        self.verbs = {}
+        # 3rd person singular -> lemma
+        self.lemmas = {}
+        self.irregular_verbs = set()
+        self.exceptions = set()
+        # noun -> 'singular', 'plural' or 'invariant'
+        self.noun_numbers = {}
+        self._load(self.path)
+        
+        self.irregular_plurals = frozenset(noun for noun, number in self.noun_numbers.items()
+                                           if number in ('plural', 'invariant'))
+        self.overregularized_pasts = self._overregularized_pasts()
+    
+    def _load(self, path):
+        """Read the table into the lookup dicts"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if not line.strip() or line.startswith('#'):
+                        continue
+                    fields = line.rstrip('\n').split('\t')
+                    if fields[0] in ('V', 'I'):
+                        lemma, third_person, past, participle = fields[1:5]
+                        self.verbs[lemma] = (third_person, tuple(past.split('|')), tuple(participle.split('|')))
+                        self.lemmas[third_person] = lemma
+                        if fields[0] == 'I':
+                            self.irregular_verbs.add(lemma)
+                    elif fields[0] == 'N':
+                        singular, plural = fields[1:3]
+                        if singular == plural:
+                            self.noun_numbers[singular] = 'invariant'
+                        else:
+                            self.noun_numbers[singular] = 'singular'
+                            self.noun_numbers[plural] = 'plural'
+                    elif fields[0] == 'S':
+                        self.noun_numbers[fields[1]] = 'singular'
+                    elif fields[0] == 'X':
+                        self.exceptions.add(fields[1])
+        except (OSError, ValueError) as e:
+            print(f"Error loading morphology table {path}: {e}")
+    
+    def _overregularized_pasts(self):
+        """
+        Map the -ed forms learners build for irregular verbs to the correct past
+        
+        Forms that are themselves listed in the table (e.g. 'seed', 'singed')
+        or marked as exceptions ('bed') are left out, so a real word is never
+        reported.
+        
+        Returns:
+            dict: wrong form -> correct past tense, in table order
+        """
+        known = set(self.verbs) | set(self.lemmas) | set(self.noun_numbers) | self.exceptions
+        for _, past, participle in self.verbs.values():
+            known.update(past)
+            known.update(participle)
+        
+        errors = {}
+        for lemma, (_, past, _) in self.verbs.items():
+            if lemma not in self.irregular_verbs:
+                continue
+            wrong = _regular_past(lemma)
+            if wrong not in known and wrong not in errors:
+                errors[wrong] = past[0]
+        return errors
+    
+    def third_person(self, lemma):
+        """
+        Third person singular of a verb
+        
+        Args:
+            lemma (str): Lowercase base form (e.g. 'go')
+        
+        Returns:
+            str: e.g. 'goes'
+        """
+        entry = self.verbs.get(lemma)
+        return entry[0] if entry else _regular_third_person(lemma)
+    
+    def base_form(self, form):
+        """
+        Base form of a third person singular verb
+        
+        Args:
+            form (str): Lowercase verb (e.g. 'goes')
+        
+        Returns:
+            str: The base form, or None if ``form`` is not a third person singular
+        """
+        lemma = self.lemmas.get(form)
+        if lemma is not None:
+            return lemma
+        if form in self.verbs:
+            return None
+        return _regular_base(form)
+    
+    def noun_number(self, noun):
+        """Return 'singular', 'plural' or 'invariant' for a listed noun, else None"""
+        return self.noun_numbers.get(noun)
@@ -0,0 +1,171 @@
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """
+    Normalize submitted text so trivially different copies share a cache entry
+    
+    Applies Unicode NFC, collapses runs of spaces and tabs to one space and
+    strips leading/trailing whitespace. Line breaks are kept.
+    
+    Args:
+        text (str): Raw submitted text
+    
+    Returns:
+        str: Normalized text
+    """
+    text = unicodedata.normalize('NFC', text)
+    text = re.sub(r'[^\S\n]+', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
+    return text.strip()
+
+
+class AnalysisCache:
+    """
+    Bounded, thread-safe LRU cache for complete /analyze responses
+    
+    Entries are evicted least-recently-used first whenever the cache holds
+    more than ``max_entries`` responses or more than ``max_bytes`` of
+    response data (UTF-8 encoded JSON). With a ``ttl`` set, entries older than
+    that many seconds are treated as misses and dropped.
+    """
+    
+    def __init__(self, max_entries=1024, max_bytes=32 * 1024 * 1024, ttl=None):
+        """
+        Args:
+            max_entries (int): Maximum number of cached responses (0 disables the cache)
+            max_bytes (int): Maximum total size of the cached responses, in UTF-8 encoded bytes
+            ttl (float, optional): Seconds an entry stays valid; None keeps entries until evicted
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        
+        # key -> (value, size, stored_at)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    @staticmethod
+    def make_key(text, tense, version):
+        """
+        Build the cache key for a request
+        
+        Args:
+            text (str): Normalized text
+            tense (str): Selected tense ('' when none)
+            version (str): Rule-set version of the analyzer and fuzzy system
+        
+        Returns:
+            str: Hex digest identifying the request
+        """
+        payload = json.dumps([text, tense or '', version], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    @property
+    def enabled(self):
+        """Whether the cache stores anything at all"""
+        return self.max_entries > 0 and self.max_bytes > 0
+    
+    def get(self, key):
+        """
+        Look up a cached response
+        
+        Returns:
+            dict or None: A copy of the cached response, or None on a miss
+        """
+        if not self.enabled:
+            return None
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, size, stored_at = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+        
+        # Callers get their own copy so they cannot alter the cached response
+        return copy.deepcopy(value)
+    
+    def put(self, key, value):
+        """
+        Store a response, evicting least-recently-used entries as needed
+        
+        Args:
+            key (str): Key from make_key()
+            value (dict): JSON-serializable response
+        """
+        if not self.enabled:
+            return
+        
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        
+        value = copy.deepcopy(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            
+            self._entries[key] = (value, size, time.monotonic())
+            self._bytes += size
+            
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+    
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def stats(self):
+        """
+        Report cache counters and occupancy
+        
+        Returns:
+            dict: Sizes, limits and hit/miss/eviction counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+    
+    def _remove(self, key):
+        """Remove an entry; the lock must be held"""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
@@ -0,0 +1,284 @@
+from bisect import bisect_right
+from . import metrics
+
+
+class TokenRule:
+    """
+    Base class for token-level rules run by the TokenRuleEngine
+    
+    A fresh instance is created for every document, so rules can keep
+    per-document state on ``self``. The engine calls visit() once per token
+    in document order and finish() after the last token. Errors are
+    collected in ``self.errors``.
+    """
+    
+    name = 'token rule'
+    
+    def __init__(self, analyzer, doc, context):
+        """
+        Args:
+            analyzer: The GrammarAnalyzer running the rule
+            doc: spaCy Doc being checked
+            context (dict): Request data shared by all rules (target_tense,
+                subjects and the TokenView of the document)
+        """
+        self.analyzer = analyzer
+        self.doc = doc
+        self.context = context
+        self.errors = []
+    
+    def visit(self, token):
+        """Inspect a single token"""
+    
+    def finish(self):
+        """Called once after every token has been visited"""
+
+
+class TokenRuleEngine:
+    """
+    Runs many token-level rules in a single walk over a spaCy Doc
+    
+    Each registered rule sees every token, so adding a rule does not add
+    another pass over the document. An exception disables only the rule that
+    raised it, for the rest of the document; the errors it already reported
+    are kept.
+    """
+    
+    def __init__(self, rule_classes=None):
+        """
+        Args:
+            rule_classes (list, optional): TokenRule subclasses to register
+        """
+        self.rule_classes = []
+        for rule_class in rule_classes or []:
+            self.register(rule_class)
+    
+    def register(self, rule_class):
+        """Register a TokenRule subclass"""
+        self.rule_classes.append(rule_class)
+    
+    def run(self, analyzer, doc, only=None, **context):
+        """
+        Walk the document once, firing every rule per token
+        
+        Args:
+            analyzer: The GrammarAnalyzer running the rules
+            doc: spaCy Doc to check
+            only (iterable, optional): Rule classes to run; default is all of them
+            **context: Request data passed to every rule
+        
+        Returns:
+            dict: Rule name -> list of error dictionaries (empty for skipped rules)
+        """
+        results = {}
+        active = []
+        only = None if only is None else set(only)
+        
+        for rule_class in self.rule_classes:
+            results[rule_class.name] = []
+            if only is not None and rule_class not in only:
+                continue
+            try:
+                rule = rule_class(analyzer, doc, context)
+            except Exception as e:
+                print(f"Error in {rule_class.name} check: {e}")
+                metrics.FAILURES.inc('token_rules')
+                continue
+            results[rule.name] = rule.errors
+            active.append(rule)
+        
+        for token in doc:
+            for rule in list(active):
+                try:
+                    rule.visit(token)
+                except Exception as e:
+                    print(f"Error in {rule.name} check: {e}")
+                    metrics.FAILURES.inc('token_rules')
+                    active.remove(rule)
+        
+        for rule in active:
+            try:
+                rule.finish()
+            except Exception as e:
+                print(f"Error in {rule.name} check: {e}")
+                metrics.FAILURES.inc('token_rules')
+        
+        return results
+
+
+class DirectPatternRule(TokenRule):
+    """Contraction errors (he don't, they doesn't) and non-base verbs after do/does/did"""
+    
+    name = 'direct pattern'
+    
+    def visit(self, token):
+        doc = self.doc
+        i = token.i
+        if i >= len(doc) - 1 or not token.text or not doc[i+1].text:
+            return
+        
+        next_token = doc[i+1]
+        start = token.idx
+        end = next_token.idx + len(next_token.text)
+        
+        # Singular subjects with don't
+        if token.text.lower() in ["he", "she", "it"] and next_token.text.lower() == "don't":
+            self.errors.append({
+                'type': 'Contraction error',
+                'text': f"{token.text} don't",
+                'suggestion': f"Use 'doesn't' with singular subjects: '{token.text} doesn't'",
+                'start': start,
+                'end': end,
+                'replacement': f"{token.text_with_ws}doesn't"
+            })
+        # Plural subjects with doesn't
+        elif token.text.lower() in ["i", "we", "they", "you"] and next_token.text.lower() == "doesn't":
+            self.errors.append({
+                'type': 'Contraction error',
+                'text': f"{token.text} doesn't",
+                'suggestion': f"Use 'don't' with '{token.text}'",
+                'start': start,
+                'end': end,
+                'replacement': f"{token.text_with_ws}don't"
+            })
+        
+        # Check for incorrect verb forms after auxiliaries
+        if token.text.lower() in ["do", "does", "did", "don't", "doesn't", "didn't"]:
+            # If the next token is a verb but not in base form
+            if next_token.pos_ == "VERB" and next_token.tag_ != "VB":
+                # Get the base form - usually the lemma works for this
+                base_form = next_token.lemma_
+                
+                # Special handling for "to be" and other irregular verbs
+                if next_token.lemma_ == "be" and next_token.text.lower() in ["am", "is", "are", "was", "were"]:
+                    base_form = "be"
+                elif next_token.text.lower() == "has":
+                    base_form = "have"
+                
+                self.errors.append({
+                    'type': 'Auxiliary verb error',
+                    'text': f"{token.text} {next_token.text}",
+                    'suggestion': f"Use base form of verb after '{token.text}': '{token.text} {base_form}'",
+                    'start': start,
+                    'end': end,
+                    'replacement': f"{token.text_with_ws}{base_form}"
+                })
+
+
+class SubjectVerbRule(TokenRule):
+    """
+    Subject-verb agreement and contraction checks for each extracted subject
+    
+    Only active for Simple Present. The walk indexes the verbs by head and
+    position so each subject finds its verb without rescanning the document.
+    """
+    
+    name = 'subject-verb agreement'
+    
+    def __init__(self, analyzer, doc, context):
+        super().__init__(analyzer, doc, context)
+        self.enabled = context.get('target_tense') == "Simple Present" and bool(context.get('subjects'))
+        self.first_verb_by_head = {}
+        self.verb_positions = []
+    
+    def visit(self, token):
+        if self.enabled and token.pos_ == "VERB":
+            self.first_verb_by_head.setdefault(token.head.i, token)
+            self.verb_positions.append(token.i)
+    
+    def finish(self):
+        if not self.enabled:
+            return
+        
+        doc = self.doc
+        # Several verbs can share one subject ("she doesn't like"); check each pair once
+        checked = set()
+        # Contraction positions, indexed once for all subjects
+        contractions = self.analyzer._index_contractions(doc)
+        for subject_info in self.context['subjects']:
+            subject_token = doc[subject_info['position']] if subject_info['position'] < len(doc) else None
+            if not subject_token:
+                continue
+            
+            # First look for direct dependency, then for a verb after the subject
+            verb = self.first_verb_by_head.get(subject_token.i)
+            if not verb:
+                next_verb = bisect_right(self.verb_positions, subject_info['position'])
+                if next_verb < len(self.verb_positions):
+                    verb = doc[self.verb_positions[next_verb]]
+            
+            if verb and (subject_token.i, verb.i) not in checked:
+                checked.add((subject_token.i, verb.i))
+                # Check for subject-verb agreement errors
+                has_error, correct_form = self.analyzer._check_sv_agreement_simple_present(
+                    subject_info, verb, doc)
+                
+                if has_error and correct_form:
+                    # Span from the subject to the verb; only the verb is rewritten
+                    subject_start = subject_info.get('start', subject_token.idx)
+                    start = min(subject_start, verb.idx)
+                    end = max(subject_info.get('end', subject_token.idx + len(subject_token.text)),
+                              verb.idx + len(verb.text))
+                    replacement = None
+                    if verb.idx >= subject_info.get('end', subject_token.idx + len(subject_token.text)):
+                        replacement = doc.text[start:verb.idx] + correct_form
+                    
+                    self.errors.append({
+                        'type': 'Subject-verb agreement',
+                        'text': f"{subject_info['text']} {verb.text}",
+                        'suggestion': f"Use '{correct_form}' instead of '{verb.text}' with {subject_info['text']}",
+                        'start': start,
+                        'end': end,
+                        'replacement': replacement
+                    })
+            
+            try:
+                # Check for contraction errors (don't/doesn't)
+                contraction_errors = self.analyzer._check_contraction_errors(subject_info, doc, contractions)
+                if contraction_errors:
+                    self.errors.extend(contraction_errors)
+            except Exception as e:
+                print(f"Error checking contractions: {e}")
+
+
+class SentenceFragmentRule(TokenRule):
+    """Sentences longer than three tokens without any verb"""
+    
+    name = 'sentence fragment'
+    
+    def __init__(self, analyzer, doc, context):
+        super().__init__(analyzer, doc, context)
+        if not doc.has_annotation("SENT_START"):
+            raise ValueError("sentence boundaries are not set on the document")
+    
+    def finish(self):
+        # Found on the document's feature arrays rather than token by token
+        for start, end in self.context['view'].features.fragments():
+            span = self.doc[start:end]
+            self.errors.append({
+                'type': 'Sentence fragment',
+                'text': span.text,
+                'suggestion': 'This may be a sentence fragment. Consider adding a verb.',
+                'start': span.start_char,
+                'end': span.end_char,
+                'replacement': None
+            })
+
+
+class WordRepetitionRule(TokenRule):
+    """The same alphabetic word twice in a row"""
+    
+    name = 'word repetition'
+    
+    def visit(self, token):
+        if token.i > 0:
+            previous = self.doc[token.i - 1]
+            if token.text.lower() == previous.text.lower() and token.is_alpha:
+                self.errors.append({
+                    'type': 'Word repetition',
+                    'text': f"{previous.text} {token.text}",
+                    'suggestion': f'Remove the repeated word "{token.text}"',
+                    'start': previous.idx,
+                    'end': token.idx + len(token.text),
+                    'replacement': previous.text
+                })
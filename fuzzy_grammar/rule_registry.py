@@ -0,0 +1,181 @@
+# spaCy components (en_core_web_* pipelines) that produce each token annotation.
+# Sentence boundaries come from the parser, or from a rule-based sentencizer
+# when the parser is pruned, so they need no component of their own.
+ANNOTATION_COMPONENTS = {
+    'TAG': ('tok2vec', 'tagger'),
+    'POS': ('tok2vec', 'tagger', 'attribute_ruler'),
+    'LEMMA': ('tok2vec', 'tagger', 'attribute_ruler', 'lemmatizer'),
+    'DEP': ('tok2vec', 'parser'),
+    'SENT_START': (),
+}
+
+# Components the registry may switch off; anything else in the pipeline always runs
+PRUNABLE_COMPONENTS = frozenset(name for names in ANNOTATION_COMPONENTS.values() for name in names)
+
+
+class RuleSpec:
+    """Declaration of one detector: what it checks, what it needs and what it costs"""
+    
+    def __init__(self, name, category, requires=(), cost='low', description=''):
+        """
+        Args:
+            name (str): Unique rule name
+            category (str): Kind of error the rule reports (e.g. 'agreement')
+            requires (tuple): Token annotations the rule reads ('TAG', 'POS',
+                'LEMMA', 'DEP', 'SENT_START'); empty for text/token-only rules
+            cost (str): Relative cost of the rule itself ('low', 'medium', 'high')
+            description (str): Short human-readable summary
+        """
+        self.name = name
+        self.category = category
+        self.requires = tuple(requires)
+        self.cost = cost
+        self.description = description
+    
+    def to_dict(self):
+        """Return the declaration as a JSON-serializable dict"""
+        return {
+            'name': self.name,
+            'category': self.category,
+            'requires': list(self.requires),
+            'cost': self.cost,
+            'description': self.description
+        }
+
+
+class RuleRegistry:
+    """
+    Registry of the analyzer's detectors and named rule profiles
+    
+    Each rule declares the annotations it needs, so the spaCy components a
+    rule set requires can be worked out up front: a profile of lexical rules
+    needs no tagger or parser at all.
+    """
+    
+    def __init__(self, specs=(), profiles=None):
+        """
+        Args:
+            specs (iterable): RuleSpec declarations, in reporting order
+            profiles (dict, optional): Profile name -> rule names (None means every rule)
+        """
+        self.specs = {}
+        for spec in specs:
+            self.register(spec)
+        self.profiles = dict(profiles or {})
+    
+    def register(self, spec):
+        """Add a rule declaration"""
+        if spec.name in self.specs:
+            raise ValueError(f"Rule '{spec.name}' is already registered")
+        self.specs[spec.name] = spec
+    
+    def __contains__(self, name):
+        return name in self.specs
+    
+    def names(self):
+        """Return every rule name, in registration order"""
+        return list(self.specs)
+    
+    def resolve(self, selection=None):
+        """
+        Turn a profile name or a list of rule names into a set of rule names
+        
+        Args:
+            selection (str or iterable, optional): Profile name, rule names, or
+                None for every rule
+        
+        Returns:
+            frozenset: Names of the selected rules
+        
+        Raises:
+            ValueError: If the profile or a rule name is unknown
+        """
+        if selection is None:
+            return frozenset(self.specs)
+        
+        if isinstance(selection, str):
+            if selection not in self.profiles:
+                raise ValueError(f"Unknown rule profile '{selection}'")
+            names = self.profiles[selection]
+            return frozenset(self.specs) if names is None else frozenset(names)
+        
+        names = frozenset(selection)
+        unknown = names - set(self.specs)
+        if unknown:
+            raise ValueError(f"Unknown rules: {', '.join(sorted(unknown))}")
+        return names
+    
+    def annotations_for(self, names):
+        """Return the set of annotations needed by the given rules"""
+        return {annotation for name in names for annotation in self.specs[name].requires}
+    
+    def components_for(self, names):
+        """
+        Return the prunable spaCy components needed by the given rules
+        
+        Args:
+            names (iterable): Rule names
+        
+        Returns:
+            set: Component names (see ANNOTATION_COMPONENTS)
+        """
+        components = set()
+        for annotation in self.annotations_for(names):
+            components.update(ANNOTATION_COMPONENTS.get(annotation, ()))
+        return components
+    
+    def describe(self, active=None):
+        """
+        Describe every rule and whether it is active
+        
+        Args:
+            active (iterable, optional): Names of the active rules
+        
+        Returns:
+            list: One dict per rule
+        """
+        active = set(self.specs) if active is None else set(active)
+        return [dict(spec.to_dict(), active=spec.name in active) for spec in self.specs.values()]
+
+
+# Detectors run by GrammarAnalyzer._detect_errors, in reporting order
+DEFAULT_RULES = (
+    RuleSpec('contraction', 'agreement', ('POS', 'TAG', 'LEMMA'), 'low',
+             "Contractions after subjects (he don't) and non-base verbs after do/does/did"),
+    RuleSpec('subject_verb', 'agreement', ('POS', 'TAG', 'LEMMA', 'DEP'), 'high',
+             'Simple Present subject-verb agreement for each extracted subject'),
+    RuleSpec('sv_pattern', 'agreement', ('TAG',), 'low',
+             'Fixed subject-verb agreement patterns (I has, they is)'),
+    RuleSpec('double_negation', 'negation', (), 'low',
+             'Two negative words in one clause'),
+    RuleSpec('gerund_infinitive', 'verb form', ('TAG',), 'low',
+             'Gerund/infinitive after enjoy, finish, want and hope'),
+    RuleSpec('conditional', 'verb form', ('LEMMA',), 'low',
+             '"will" inside an if-clause'),
+    RuleSpec('phrasal_verb', 'word choice', (), 'low',
+             'Misused phrasal verbs'),
+    RuleSpec('raw_text', 'word choice', (), 'medium',
+             'Regex rules: articles, prepositions, word usage, modal and irregular verbs'),
+    RuleSpec('sentence_fragment', 'structure', ('POS', 'SENT_START'), 'low',
+             'Sentences of more than three tokens without a verb'),
+    RuleSpec('tense', 'tense', (), 'medium',
+             'Word sequences that are wrong for the selected tense'),
+    RuleSpec('word_repetition', 'style', (), 'low',
+             'The same word twice in a row'),
+    RuleSpec('article_a_an', 'article', (), 'low',
+             '"a" before a vowel and "an" before a consonant'),
+)
+
+# Named rule sets; None selects every rule
+DEFAULT_PROFILES = {
+    'full': None,
+    # Everything except the dependency parse
+    'tagged': [spec.name for spec in DEFAULT_RULES if 'DEP' not in spec.requires],
+    # Text and token rules only: no tagger or parser
+    'lexical': [spec.name for spec in DEFAULT_RULES if set(spec.requires) <= {'SENT_START'}],
+}
+
+
+def default_registry():
+    """Return a registry of the built-in detectors and profiles"""
+    return RuleRegistry(DEFAULT_RULES, DEFAULT_PROFILES)
@@ -0,0 +1,136 @@
+import re
+
+
+class RegexRule:
+    """A single raw-text rule: a regex plus the error it reports"""
+    
+    def __init__(self, index, regex, error_type, suggestion, replacement=None):
+        self.index = index
+        self.regex = regex
+        self.error_type = error_type
+        # Suggestion template, formatted with the match (e.g. '"an {match[2]}"')
+        self.suggestion = suggestion
+        # Text that replaces the whole match: template, callable(match) or None
+        self.replacement = replacement
+    
+    def format_suggestion(self, match):
+        """Build the human-readable suggestion for a match of this rule"""
+        return self.suggestion.format(match=match)
+    
+    def format_replacement(self, match):
+        """Build the machine-readable replacement for a match, or None"""
+        if self.replacement is None:
+            return None
+        if callable(self.replacement):
+            return self.replacement(match)
+        return self.replacement.format(match=match)
+
+
+class RegexRuleScanner:
+    """
+    Finds every raw-text rule hit with a single pass over the text
+    
+    Rules whose pattern starts with a literal word (or an alternation of
+    literal phrases) are indexed by that leading word. One combined regex
+    locates every leading word in the text, and only the rules keyed on that
+    word are tried, anchored at its position. The cost therefore grows with
+    the text length and the number of hits rather than with the number of
+    rules. Patterns without a literal leading word fall back to a full scan.
+    
+    Hits are reported exactly as separate re.finditer calls per rule would
+    report them: non-overlapping per rule and ordered by rule, then position.
+    """
+    
+    # Leading "\b(word|two words)" or "\bword" followed by a space, \s or \b
+    _LEADING_GROUP = re.compile(r'^(?:\\b)?\(((?:[A-Za-z]+(?: [A-Za-z]+)*)(?:\|[A-Za-z]+(?: [A-Za-z]+)*)*)\)(?= |\\[sb])')
+    _LEADING_WORD = re.compile(r'^(?:\\b)?([A-Za-z]+)(?= |\\[sb])')
+    
+    def __init__(self):
+        """Initialize an empty scanner"""
+        self.rules = []
+        self._rules_by_trigger = {}
+        self._fallback_rules = []
+        self._trigger_regex = None
+    
+    def add(self, pattern, error_type, suggestion, flags=re.IGNORECASE, replacement=None):
+        """
+        Register a rule
+        
+        Args:
+            pattern (str or re.Pattern): Regex of the error
+            error_type (str): Error type reported for each hit
+            suggestion (str): Suggestion template, formatted with ``match``
+            flags (int): Regex flags used when ``pattern`` is a string
+            replacement (str or callable, optional): Replacement for the whole
+                match, as a template formatted with ``match`` or a function
+        """
+        regex = pattern if isinstance(pattern, re.Pattern) else re.compile(pattern, flags)
+        rule = RegexRule(len(self.rules), regex, error_type, suggestion, replacement)
+        self.rules.append(rule)
+        
+        triggers = self._leading_words(regex)
+        if triggers is None:
+            self._fallback_rules.append(rule)
+        else:
+            for trigger in triggers:
+                self._rules_by_trigger.setdefault(trigger, []).append(rule)
+        
+        # Rebuild the combined trigger regex on next scan
+        self._trigger_regex = None
+    
+    def _leading_words(self, regex):
+        """Return the set of lowercase words a match of ``regex`` must start with, or None"""
+        if not regex.flags & re.IGNORECASE:
+            return None
+        
+        group = self._LEADING_GROUP.match(regex.pattern)
+        if group:
+            return {alternative.split()[0].lower() for alternative in group.group(1).split('|')}
+        
+        word = self._LEADING_WORD.match(regex.pattern)
+        if word:
+            return {word.group(1).lower()}
+        
+        return None
+    
+    def _compile(self):
+        """Combine all trigger words into one alternation"""
+        words = sorted(self._rules_by_trigger, key=len, reverse=True)
+        if words:
+            self._trigger_regex = re.compile(r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b', re.IGNORECASE)
+        else:
+            self._trigger_regex = re.compile(r'(?!)')
+    
+    def scan(self, text):
+        """
+        Find all rule hits in the text
+        
+        Args:
+            text (str): Raw input text
+        
+        Returns:
+            list: (rule, match) pairs ordered by rule, then by position
+        """
+        if self._trigger_regex is None:
+            self._compile()
+        
+        hits = []
+        last_end = {}
+        
+        for trigger in self._trigger_regex.finditer(text):
+            start = trigger.start()
+            for rule in self._rules_by_trigger.get(trigger.group(0).lower(), ()):
+                # Keep re.finditer semantics: no overlapping hits of one rule
+                if start < last_end.get(rule.index, 0):
+                    continue
+                match = rule.regex.match(text, start)
+                if match:
+                    hits.append((rule.index, start, rule, match))
+                    last_end[rule.index] = max(match.end(), start + 1)
+        
+        for rule in self._fallback_rules:
+            for match in rule.regex.finditer(text):
+                hits.append((rule.index, match.start(), rule, match))
+        
+        hits.sort(key=lambda hit: (hit[0], hit[1]))
+        return [(rule, match) for _, _, rule, match in hits]
@@ -0,0 +1,57 @@
+class TensePatternIndex:
+    """
+    Token-sequence trie over the tense error patterns of every tense
+    
+    Each pattern (e.g. 'he have gone') is stored as a path of lowercase words.
+    Matching walks the trie from every word of the text, so the cost is
+    O(words x longest pattern) no matter how many patterns a tense has.
+    """
+    
+    def __init__(self, tense_corrections):
+        """
+        Build one trie per tense
+        
+        Args:
+            tense_corrections (dict): tense -> {error pattern: correction}
+        """
+        self.tries = {}
+        for tense, corrections in tense_corrections.items():
+            root = {}
+            for order, (error_pattern, correction) in enumerate(corrections.items()):
+                node = root
+                for word in error_pattern.lower().split():
+                    node = node.setdefault(word, {})
+                # None is never a word, so it safely marks the end of a pattern
+                node.setdefault(None, []).append((order, correction))
+            self.tries[tense] = root
+    
+    def find(self, tense, words):
+        """
+        Find every occurrence of the tense's patterns in a list of words
+        
+        Args:
+            tense (str): Tense whose patterns should be matched
+            words (list): Lowercase words of the text
+        
+        Returns:
+            list: (start, length, correction) tuples, ordered by pattern and
+                then position, as a pattern-by-pattern scan would report them
+        """
+        root = self.tries.get(tense)
+        if not root:
+            return []
+        
+        hits = []
+        for start in range(len(words)):
+            node = root
+            position = start
+            while position < len(words):
+                node = node.get(words[position])
+                if node is None:
+                    break
+                position += 1
+                for order, correction in node.get(None, ()):
+                    hits.append((order, start, position - start, correction))
+        
+        hits.sort(key=lambda hit: (hit[0], hit[1]))
+        return [(start, length, correction) for _, start, length, correction in hits]
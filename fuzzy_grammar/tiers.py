@@ -0,0 +1,149 @@
+import threading
+
+
+# Words that make a POS-based rule possible: do-auxiliaries (auxiliary verb
+# errors), the heads of the TAG/LEMMA matcher patterns (he/she/it + VB,
+# enjoy/finish + to + VB, want/hope + VBG, if ... will)
+TAGGER_TRIGGERS = frozenset({
+    'do', 'does', 'did', "don't", "doesn't", "didn't",
+    'he', 'she', 'it', 'enjoy', 'finish', 'want', 'hope', 'if'
+})
+
+# Contractions checked against the subject by the Simple Present agreement rule
+CONTRACTION_TRIGGERS = frozenset({"don't", "doesn't", "haven't", "hasn't", "isn't", "aren't", "amn't"})
+
+# Sentences longer than this many tokens can be fragments, which needs POS tags
+FRAGMENT_MIN_TOKENS = 4
+
+# Components that produce the dependency parse
+PARSE_COMPONENTS = ('parser',)
+
+TIER_NAMES = {0: 'tokenizer', 1: 'tagger', 2: 'parser'}
+
+
+class TierStats:
+    """Thread-safe per-tier request counts and latency totals"""
+    
+    def __init__(self):
+        """Initialize empty counters"""
+        self._lock = threading.Lock()
+        self._counts = {tier: 0 for tier in TIER_NAMES}
+        self._seconds = {tier: 0.0 for tier in TIER_NAMES}
+    
+    def record(self, tier, seconds):
+        """
+        Record one analysis
+        
+        Args:
+            tier (int): Deepest tier the analysis needed
+            seconds (float): Wall time of the analysis
+        """
+        with self._lock:
+            self._counts[tier] += 1
+            self._seconds[tier] += seconds
+    
+    def stats(self):
+        """
+        Report the share of requests and mean latency of each tier
+        
+        Returns:
+            dict: Tier name -> count, hit_rate and mean_ms
+        """
+        with self._lock:
+            total = sum(self._counts.values())
+            return {
+                TIER_NAMES[tier]: {
+                    'count': count,
+                    'hit_rate': count / total if total else 0.0,
+                    'mean_ms': self._seconds[tier] / count * 1000 if count else 0.0
+                }
+                for tier, count in self._counts.items()
+            }
+
+
+class TieredParser:
+    """
+    Runs only as much of the spaCy pipeline as the rules need for a text
+    
+    Tier 0 tokenizes (plus a rule-based sentencizer); the raw-text and
+    token-level rules run on that. Tier 1 adds the tagger, attribute ruler
+    and lemmatizer when the text contains a POS trigger or a sentence long
+    enough to be a fragment. Tier 2 adds the dependency parser when Simple
+    Present subject-verb agreement needs subjects, i.e. the tagged text has
+    both a candidate subject and a verb or contraction.
+    
+    Components are called directly on the Doc rather than toggled on the
+    shared pipeline, so concurrent requests at different tiers do not
+    interfere.
+    """
+    
+    def __init__(self, nlp):
+        """
+        Args:
+            nlp: Loaded spaCy pipeline
+        """
+        # Imported here so importing this module does not load spaCy
+        from spacy.pipeline import Sentencizer
+        
+        self.nlp = nlp
+        self.sentencizer = Sentencizer()
+        self.stats = TierStats()
+    
+    def parse(self, text, tense=None, full=False):
+        """
+        Parse text up to the tier its content needs
+        
+        Args:
+            text (str): Text to parse
+            tense (str, optional): Tense the rules will check against
+            full (bool): Always run the whole pipeline
+        
+        Returns:
+            tuple: (doc, tier)
+        """
+        if full:
+            return self.nlp(text), 2
+        
+        doc = self.nlp.make_doc(text)
+        sent_starts = self.sentencizer.predict([doc])
+        
+        tier = 1 if self._needs_tagger(doc, sent_starts[0]) else 0
+        if tier:
+            for name, proc in self.nlp.pipeline:
+                if name not in PARSE_COMPONENTS:
+                    doc = proc(doc)
+            
+            if tense == "Simple Present" and self._needs_parser(doc):
+                for name, proc in self.nlp.pipeline:
+                    if name in PARSE_COMPONENTS:
+                        doc = proc(doc)
+                return doc, 2
+        
+        self.sentencizer.set_annotations([doc], sent_starts)
+        return doc, tier
+    
+    def _needs_tagger(self, doc, sent_starts):
+        """Whether any POS-based rule could fire on the tokenized text"""
+        if any(token.lower_ in TAGGER_TRIGGERS for token in doc):
+            return True
+        
+        # Fragments are sentences without a verb, found from POS tags
+        length = 0
+        for is_start in sent_starts:
+            length = 1 if is_start else length + 1
+            if length >= FRAGMENT_MIN_TOKENS:
+                return True
+        return False
+    
+    def _needs_parser(self, doc):
+        """Whether subject-verb agreement could fire on the tagged text"""
+        has_subject = False
+        has_verb = False
+        for token in doc:
+            if token.pos_ in ("NOUN", "PROPN", "PRON"):
+                has_subject = True
+            elif token.pos_ == "VERB" or token.lower_ in CONTRACTION_TRIGGERS:
+                has_verb = True
+            if has_subject and has_verb:
+                return True
+        return False
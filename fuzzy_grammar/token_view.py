@@ -0,0 +1,84 @@
+import re
+
+
+# Whitespace-separated words, as str.split() finds them
+_WHITESPACE_WORD_RE = re.compile(r'\S+')
+
+# Runs of word characters, as the English validity gate counts them
+_LEXICAL_WORD_RE = re.compile(r'\b\w+\b')
+
+
+class TokenView:
+    """
+    The tokenizations of one request's text, computed once and shared
+    
+    Holds the lowercased text, its whitespace-separated words with their
+    character offsets, the word-character runs used by the English
+    validity gate and, once the text is parsed, the spaCy Doc with its
+    DocFeatures arrays. Each view is created for one text and passed to
+    every stage of its analysis, so the same text is split at most once
+    per kind of split; every tokenization is computed on first use.
+    """
+    
+    def __init__(self, text, doc=None):
+        """
+        Args:
+            text (str): The text being analyzed
+            doc (Doc, optional): spaCy parse of ``text``; can be set later
+        """
+        self.text = text
+        self.doc = doc
+        self._lower = None
+        self._words = None
+        self._word_texts = None
+        self._lower_words = None
+        self._lexical_words = None
+        self._features = None
+    
+    @property
+    def lower(self):
+        """The lowercased text"""
+        if self._lower is None:
+            self._lower = self.text.lower()
+        return self._lower
+    
+    @property
+    def words(self):
+        """Match objects of the whitespace-separated words, with their offsets"""
+        if self._words is None:
+            self._words = list(_WHITESPACE_WORD_RE.finditer(self.text))
+        return self._words
+    
+    @property
+    def word_texts(self):
+        """The whitespace-separated words, as text.split() returns them"""
+        if self._word_texts is None:
+            self._word_texts = [word.group(0) for word in self.words]
+        return self._word_texts
+    
+    @property
+    def lower_words(self):
+        """The whitespace-separated words, lowercased"""
+        if self._lower_words is None:
+            self._lower_words = [word.lower() for word in self.word_texts]
+        return self._lower_words
+    
+    @property
+    def lexical_words(self):
+        """Runs of word characters in the lowercased text (punctuation dropped)"""
+        if self._lexical_words is None:
+            self._lexical_words = _LEXICAL_WORD_RE.findall(self.lower)
+        return self._lexical_words
+    
+    @property
+    def features(self):
+        """DocFeatures of ``self.doc``, extracted once per document"""
+        if self._features is None or self._features.doc is not self.doc:
+            # Imported here so importing the analyzer does not load NumPy and spaCy
+            from .doc_features import DocFeatures
+            self._features = DocFeatures(self.doc)
+        return self._features
+    
+    def word_count(self):
+        """Number of whitespace-separated words"""
+        return len(self.words)
@@ -3,6 +3,9 @@
 // Global chart variable
 let accuracyChart = null;
 
+// Texts at least this long are analyzed with the streaming endpoint
+const STREAM_MIN_LENGTH = 1500;
+
 document.addEventListener('DOMContentLoaded', () => {
     // DOM elements
     const grammarForm = document.getElementById('grammar-form');
@@ -65,21 +68,28 @@ document.addEventListener('DOMContentLoaded', () => {
         analyzeSpinner.classList.remove('d-none');
         
         try {
-            // Send the text to the server for analysis
-            const response = await fetch('/analyze', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ text, tense }),
-            });
+            let data;
             
-            if (!response.ok) {
-                throw new Error(`Server error: ${response.status}`);
+            if (text.length >= STREAM_MIN_LENGTH && window.ReadableStream && window.TextDecoder) {
+                // Long documents: render sentence results as they arrive
+                data = await analyzeStreaming(text, tense);
+            } else {
+                // Send the text to the server for analysis
+                const response = await fetch('/analyze', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ text, tense }),
+                });
+                
+                if (!response.ok) {
+                    throw new Error(`Server error: ${response.status}`);
+                }
+                
+                data = await response.json();
             }
             
-            const data = await response.json();
-            
             // Display the results
             displayResults(data);
             
@@ -153,6 +163,95 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
+    /**
+     * Analyze with /analyze_stream, rendering each sentence's results as it arrives
+     * Resolves with the final summary, which has the same shape as an /analyze response
+     */
+    async function analyzeStreaming(text, tense) {
+        const response = await fetch('/analyze_stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ text, tense }),
+        });
+        
+        if (!response.ok) {
+            throw new Error(`Server error: ${response.status}`);
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let analyzedText = text;
+        const errors = [];
+        const chunks = [];
+        let summary = null;
+        
+        const handleEvent = (event) => {
+            if (event.event === 'start') {
+                analyzedText = event.text;
+            } else if (event.event === 'chunk') {
+                errors.push(...event.errors);
+                chunks.push(event);
+                displayPartialResults(analyzedText, errors, chunks);
+            } else if (event.event === 'summary') {
+                summary = event;
+            } else if (event.event === 'error') {
+                throw new Error(event.error);
+            }
+        };
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
+            
+            // Events are newline-delimited; keep any incomplete line for the next read
+            buffer += decoder.decode(value, { stream: true });
+            let newline;
+            while ((newline = buffer.indexOf('\n')) !== -1) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (line) {
+                    handleEvent(JSON.parse(line));
+                }
+            }
+        }
+        
+        if (buffer.trim()) {
+            handleEvent(JSON.parse(buffer));
+        }
+        
+        if (!summary) {
+            throw new Error('Analysis stream ended without a summary');
+        }
+        return summary;
+    }
+    
+    /**
+     * Show the errors and corrections of the sentences checked so far
+     */
+    function displayPartialResults(text, errors, chunks) {
+        resultsSection.classList.remove('d-none');
+        invalidEnglishAlert.classList.add('d-none');
+        validResults.classList.remove('d-none');
+        
+        overallFeedback.textContent = `Analyzing... ${chunks.length} sentence${chunks.length === 1 ? '' : 's'} checked so far.`;
+        
+        // Stitch the corrected sentences into the untouched text between them
+        let corrected = '';
+        let cursor = 0;
+        chunks.forEach(chunk => {
+            corrected += text.substring(cursor, chunk.start) + chunk.corrections;
+            cursor = chunk.end;
+        });
+        correctedText.textContent = corrected + text.substring(cursor);
+        
+        interactiveText.innerHTML = createInteractiveText(text, errors);
+    }
+    
     /**
      * Display the analysis results in the UI
      */
@@ -183,11 +282,14 @@ document.addEventListener('DOMContentLoaded', () => {
         // Update overall feedback
         overallFeedback.textContent = feedback.overall_feedback;
         
+        // Error offsets refer to the text as analyzed (normalized by the server)
+        const analyzedText = data.text || textInput.value;
+        
         // Update corrected text
-        correctedText.textContent = analysis.corrections || textInput.value;
+        correctedText.textContent = analysis.corrections || analyzedText;
         
         // Update interactive text with error highlighting
-        interactiveText.innerHTML = createInteractiveText(textInput.value, analysis.errors);
+        interactiveText.innerHTML = createInteractiveText(analyzedText, analysis.errors);
         
         // Initialize tooltips for error highlights
         initializeTooltips();
@@ -244,38 +346,44 @@ document.addEventListener('DOMContentLoaded', () => {
             return escapeHtml(text);
         }
         
-        // Sort errors by position in text to process them in order
-        const sortedErrors = [...errors].sort((a, b) => {
-            return text.indexOf(a.text) - text.indexOf(b.text);
+        // Resolve each error to a character range; older responses without
+        // offsets fall back to the first occurrence of the error text
+        const spans = [];
+        errors.forEach((error, order) => {
+            let start = error.start;
+            let end = error.end;
+            if (typeof start !== 'number' || typeof end !== 'number') {
+                start = text.indexOf(error.text);
+                end = start + (error.text || '').length;
+            }
+            if (start >= 0 && end > start && end <= text.length) {
+                spans.push({ error, start, end, order });
+            }
         });
+        spans.sort((a, b) => a.start - b.start || a.order - b.order);
         
-        let result = text;
-        
-        // Replace errors with highlighted spans with tooltips
-        // Process in reverse order to avoid changing positions as we modify the text
-        for (let i = sortedErrors.length - 1; i >= 0; i--) {
-            const error = sortedErrors[i];
-            const errorText = error.text;
-            const errorIndex = result.indexOf(errorText);
-            
-            if (errorIndex !== -1) {
-                const before = result.substring(0, errorIndex);
-                const after = result.substring(errorIndex + errorText.length);
-                const highlightedError = `
-                    <span class="error-highlight" data-error-type="${error.type}">
-                        ${escapeHtml(errorText)}
+        // Build the markup in a single pass; overlapping errors are skipped
+        const parts = [];
+        let cursor = 0;
+        spans.forEach(({ error, start, end }) => {
+            if (start < cursor) {
+                return;
+            }
+            parts.push(escapeHtml(text.substring(cursor, start)));
+            parts.push(`
+                    <span class="error-highlight" data-error-type="${escapeHtml(error.type)}">
+                        ${escapeHtml(text.substring(start, end))}
                         <span class="grammar-tooltip">
                             <strong>${escapeHtml(error.type)}</strong>
                             <div class="tooltip-suggestion">${escapeHtml(error.suggestion)}</div>
                         </span>
                     </span>
-                `;
-                result = before + highlightedError + after;
-            }
-        }
+                `);
+            cursor = end;
+        });
+        parts.push(escapeHtml(text.substring(cursor)));
         
-        // Replace new lines with space for horizontal display
-        return result;
+        return parts.join('');
     }
     
     /**
@@ -0,0 +1,119 @@
+"""
+Tests for per-request time budgets and truncated results
+
+The end-to-end tests need the spaCy model (en_core_web_sm) and are
+skipped when it is not installed.
+
+Usage:
+    python -m unittest tests.test_deadline
+"""
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from fuzzy_grammar.deadline import Deadline
+
+
+def _model_installed():
+    try:
+        import spacy
+        return spacy.util.is_package('en_core_web_sm')
+    except ImportError:
+        return False
+
+
+TEXT = "She don't like coffee and he go to school every day."
+
+
+class DeadlineTest(unittest.TestCase):
+    
+    def test_budget_left_allows_steps(self):
+        deadline = Deadline(60000)
+        self.assertTrue(deadline.allows('matcher'))
+        self.assertFalse(deadline.truncated)
+        self.assertEqual(deadline.skipped, [])
+    
+    def test_spent_budget_records_skipped_steps(self):
+        deadline = Deadline(0)
+        self.assertTrue(deadline.expired())
+        self.assertFalse(deadline.allows('matcher'))
+        self.assertFalse(deadline.allows('tense'))
+        self.assertTrue(deadline.truncated)
+        self.assertEqual(deadline.skipped, ['matcher', 'tense'])
+
+
+@unittest.skipUnless(_model_installed(), "en_core_web_sm is not installed")
+class TruncatedAnalysisTest(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        with contextlib.redirect_stdout(io.StringIO()):
+            import app
+        cls.app = app
+        cls.client = app.app.test_client()
+    
+    def setUp(self):
+        self.app.analysis_cache.clear()
+    
+    def test_expired_deadline_returns_partial_result(self):
+        analyzer = self.app.get_components().grammar_analyzer
+        
+        complete = analyzer.analyze(TEXT, 'Simple Present', deadline=Deadline(60000))
+        partial = analyzer.analyze(TEXT, 'Simple Present', deadline=Deadline(0))
+        
+        self.assertFalse(complete['truncated'])
+        self.assertTrue(complete['errors'])
+        self.assertTrue(partial['truncated'])
+        self.assertIn('token_rules', partial['skipped'])
+        self.assertIn('complexity', partial['skipped'])
+        self.assertEqual(partial['errors'], [])
+        # The result keeps its usual shape
+        for key in ('grammar_match', 'error_frequency', 'complexity', 'corrections'):
+            self.assertIn(key, partial)
+    
+    def test_truncated_responses_are_not_cached(self):
+        body = {'text': TEXT, 'tense': 'Simple Present'}
+        
+        response = self.client.post('/analyze', json=dict(body, time_budget_ms=0.001))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['truncated'])
+        self.assertEqual(self.app.analysis_cache.stats()['entries'], 0)
+        
+        # The same text without a budget is analyzed in full, then served from the cache
+        response = self.client.post('/analyze', json=body)
+        self.assertFalse(response.get_json()['truncated'])
+        self.assertTrue(response.get_json()['analysis']['errors'])
+        self.assertEqual(self.app.analysis_cache.stats()['entries'], 1)
+        
+        cached = self.client.post('/analyze', json=body)
+        self.assertEqual(cached.get_json(), response.get_json())
+    
+    
+    def test_batch_and_stream_take_the_budget(self):
+        analyzer = self.app.get_components().grammar_analyzer
+        
+        for result in analyzer.analyze_many([TEXT, TEXT], 'Simple Present', deadline=Deadline(0)):
+            self.assertTrue(result['truncated'])
+            self.assertIn('token_rules', result['skipped'])
+        
+        events = list(analyzer.analyze_stream(TEXT, 'Simple Present', deadline=Deadline(0)))
+        self.assertTrue(all(payload['truncated'] for kind, payload in events))
+        self.assertEqual(events[-1][1]['errors'], [])
+        # Every sentence skipped the same steps; each is listed once
+        skipped = events[-1][1]['skipped']
+        self.assertEqual(len(skipped), len(set(skipped)))
+    
+    def test_zero_budget_overrides_the_default(self):
+        body = {'text': TEXT, 'tense': 'Simple Present'}
+        with mock.patch.object(self.app, 'TIME_BUDGET_MS', 0.001):
+            self.assertTrue(self.client.post('/analyze', json=body).get_json()['truncated'])
+            response = self.client.post('/analyze', json=dict(body, time_budget_ms=0))
+            self.assertFalse(response.get_json()['truncated'])
+            
+            response = self.client.post('/analyze_batch', json={'texts': [TEXT], 'tense': 'Simple Present'})
+            self.assertTrue(response.get_json()['results'][0]['truncated'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Contention test for FuzzyGrammarSystem
+
+Many threads call evaluate() and the locked reference engine
+_compute_exact() on one shared instance at the same time; every result
+must equal the value computed sequentially for the same inputs.
+
+Usage:
+    python -m unittest tests.test_fuzzy_system_concurrency
+"""
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from fuzzy_grammar.fuzzy_system import FuzzyGrammarSystem
+
+
+THREADS = 16
+CALLS_PER_THREAD = 300
+
+
+class FuzzySystemConcurrencyTest(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.system = FuzzyGrammarSystem()
+        rng = np.random.default_rng(3)
+        cls.inputs = rng.uniform(0, 100, size=(200, 3))
+        cls.expected = [cls.system.evaluate(*point) for point in cls.inputs]
+        cls.expected_exact = cls.system._compute_exact(cls.inputs[:, 0], cls.inputs[:, 1], cls.inputs[:, 2])
+    
+    def _hammer(self, worker, barrier):
+        """Evaluate a worker-specific sequence of inputs and return the mismatches"""
+        mismatches = []
+        barrier.wait()
+        for call in range(CALLS_PER_THREAD):
+            index = (worker * 7 + call) % len(self.inputs)
+            point = self.inputs[index]
+            if call % 10 == 0:
+                # The scikit-fuzzy reference path shares terms between simulators
+                exact = float(self.system._compute_exact(*([value] for value in point))[0])
+                if exact != self.expected_exact[index]:
+                    mismatches.append(('exact', index, exact))
+            result = self.system.evaluate(*point)
+            if result != self.expected[index]:
+                mismatches.append(('evaluate', index, result))
+        return mismatches
+    
+    def test_concurrent_calls_are_deterministic(self):
+        barrier = threading.Barrier(THREADS)
+        with ThreadPoolExecutor(max_workers=THREADS) as pool:
+            futures = [pool.submit(self._hammer, worker, barrier) for worker in range(THREADS)]
+            mismatches = [mismatch for future in futures for mismatch in future.result()]
+        
+        self.assertEqual(mismatches, [])
+    
+    def test_evaluate_matches_reference_engine(self):
+        scores = np.array([result['severity_score'] for result in self.expected])
+        np.testing.assert_allclose(scores, self.expected_exact, atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
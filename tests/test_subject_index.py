@@ -0,0 +1,196 @@
+"""
+Equivalence and scaling tests for subject extraction on the per-doc index
+
+GrammarAnalyzer._extract_subjects must find exactly the subjects of the
+nested scan it replaced (nested_scan_subjects below), both for subjects
+found through the dependency parse and for the positional fallback with
+its comma/'and' compound lists, and its time per token must stay flat as
+run-on texts grow. Needs the spaCy model (en_core_web_sm); skipped when
+it is not installed.
+
+Usage:
+    python -m unittest tests.test_subject_index
+"""
+import contextlib
+import io
+import random
+import time
+import unittest
+
+from benchmarks.run import load_corpus
+from fuzzy_grammar.doc_index import SUBJECT_DEPS
+
+
+# Run-on texts of 1 to 16 corpus paragraphs; the time per token of the
+# longest may be at most MAX_GROWTH times that of the shortest (a quadratic
+# scan grows about 16x)
+RUN_ON_SIZES = (1, 2, 4, 8, 16)
+MAX_GROWTH = 3.0
+
+
+def nested_scan_subjects(analyzer, doc):
+    """The verb-by-verb rescan of the document the index replaces"""
+    subjects = []
+    verbs = [token for token in doc if token.pos_ == "VERB" or token.pos_ == "AUX"]
+    for verb in verbs:
+        subject = None
+        compound_subject = []
+        compound_start_idx = None
+        compound_end_idx = None
+        
+        for token in doc:
+            if token.dep_ in ["nsubj", "nsubjpass"] and token.head == verb:
+                subject = token
+                compound_start_idx = token.i
+                compound_end_idx = token.i + 1
+                for child in token.children:
+                    if child.dep_ == "conj":
+                        compound_subject.append(child)
+                        compound_end_idx = max(compound_end_idx, child.i + 1)
+                for i in range(max(0, token.i-10), min(verb.i, len(doc))):
+                    if doc[i].text == ',' or doc[i].text.lower() == 'and':
+                        for j in range(i+1, min(verb.i, len(doc))):
+                            if doc[j].pos_ in ["NOUN", "PROPN", "PRON"]:
+                                compound_subject.append(doc[j])
+                                compound_start_idx = min(compound_start_idx, i)
+                                compound_end_idx = max(compound_end_idx, j + 1)
+                                break
+                break
+        
+        if not subject:
+            for token in doc[:verb.i]:
+                if token.pos_ in ["NOUN", "PROPN", "PRON"] and token.dep_ not in ["dobj", "pobj"]:
+                    subject = token
+                    compound_start_idx = token.i
+                    compound_end_idx = token.i + 1
+                    for i in range(max(0, token.i-5), token.i):
+                        if doc[i].text == ',' or doc[i].text.lower() == 'and':
+                            for j in range(i+1, token.i):
+                                if doc[j].pos_ in ["NOUN", "PROPN", "PRON"]:
+                                    compound_subject.append(doc[j])
+                                    compound_start_idx = min(compound_start_idx, j)
+        
+        if not subject:
+            continue
+        
+        is_plural = analyzer._is_subject_plural(subject, doc, compound_subject)
+        if compound_subject:
+            subject_span = doc[compound_start_idx:compound_end_idx]
+        else:
+            start_idx = subject.i
+            for token in doc:
+                if token.head == subject and token.i < subject.i:
+                    start_idx = min(start_idx, token.i)
+            subject_span = doc[start_idx:subject.i + 1]
+        
+        subjects.append({
+            'text': subject_span.text,
+            'is_plural': is_plural,
+            'position': subject.i,
+            'token': subject.text,
+            'pos': subject.pos_,
+            'compound': [cs.text for cs in compound_subject] if compound_subject else None,
+            'start': subject_span.start_char,
+            'end': subject_span.end_char
+        })
+    return subjects
+
+
+
+def run_on_text(paragraphs, count):
+    """Join ``count`` paragraphs into one long run-on sentence"""
+    parts = [paragraphs[i % len(paragraphs)].rstrip('.!? ').replace('. ', ', and ') for i in range(count)]
+    return ', and '.join(parts) + '.'
+
+
+def _model_installed():
+    try:
+        import spacy
+        return spacy.util.is_package('en_core_web_sm')
+    except ImportError:
+        return False
+
+
+@unittest.skipUnless(_model_installed(), "en_core_web_sm is not installed")
+class SubjectIndexEquivalenceTest(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        with contextlib.redirect_stdout(io.StringIO()):
+            from fuzzy_grammar.grammar_analyzer import GrammarAnalyzer
+            cls.analyzer = GrammarAnalyzer()
+    
+    def _doc(self, words, heads, deps, pos):
+        from spacy.tokens import Doc
+        return Doc(self.analyzer.nlp.vocab, words=words, heads=heads, deps=deps, pos=pos)
+    
+    def assertSameSubjects(self, doc):
+        self.assertEqual(self.analyzer._extract_subjects(doc), nested_scan_subjects(self.analyzer, doc), doc.text)
+    
+    def test_corpus(self):
+        corpus = load_corpus()
+        paths = {'dependency': 0, 'positional': 0}
+        for size in ('sentences', 'paragraphs', 'essays'):
+            for text, _ in corpus[size]:
+                doc = self.analyzer.nlp(text)
+                self.assertSameSubjects(doc)
+                for subject in self.analyzer._extract_subjects(doc):
+                    path = 'dependency' if doc[subject['position']].dep_ in SUBJECT_DEPS else 'positional'
+                    paths[path] += 1
+        
+        self.assertGreater(paths['dependency'], 0)
+    
+    def test_dependency_subject_with_conjuncts(self):
+        # "John , Mary and Tom play ." with John as nsubj and the others as conj
+        doc = self._doc(['John', ',', 'Mary', 'and', 'Tom', 'play', '.'],
+                        heads=[5, 0, 0, 0, 0, 5, 5],
+                        deps=['nsubj', 'punct', 'conj', 'cc', 'conj', 'ROOT', 'punct'],
+                        pos=['PROPN', 'PUNCT', 'PROPN', 'CCONJ', 'PROPN', 'VERB', 'PUNCT'])
+        self.assertSameSubjects(doc)
+        subjects = self.analyzer._extract_subjects(doc)
+        self.assertEqual(subjects[0]['position'], 0)
+        self.assertTrue(subjects[0]['compound'])
+    
+    def test_positional_subject_with_list(self):
+        # No nsubj: the subject is the last non-object nominal before the verb,
+        # with the nominals listed before it
+        doc = self._doc(['Cats', ',', 'dogs', 'and', 'birds', 'often', 'sleep', '.'],
+                        heads=[6, 6, 6, 6, 6, 6, 6, 6],
+                        deps=['dep', 'punct', 'dep', 'cc', 'dep', 'advmod', 'ROOT', 'punct'],
+                        pos=['NOUN', 'PUNCT', 'NOUN', 'CCONJ', 'NOUN', 'ADV', 'VERB', 'PUNCT'])
+        self.assertSameSubjects(doc)
+        subjects = self.analyzer._extract_subjects(doc)
+        self.assertEqual(subjects[0]['position'], 4)
+        self.assertTrue(subjects[0]['compound'])
+    
+    def test_random_parses(self):
+        rng = random.Random(1)
+        words = ['he', 'they', 'dog', 'dogs', 'John', ',', 'and', 'go', 'goes', 'is', 'the', 'apples', 'news']
+        pos = ['NOUN', 'PROPN', 'PRON', 'VERB', 'AUX', 'DET', 'CCONJ', 'PUNCT', 'ADJ']
+        deps = ['nsubj', 'nsubjpass', 'conj', 'dobj', 'pobj', 'det', 'amod', 'cc', 'punct', 'dep']
+        for _ in range(500):
+            n = rng.randint(1, 25)
+            root = rng.randrange(n)
+            doc = self._doc([rng.choice(words) for _ in range(n)],
+                            heads=[i if i == root else rng.randrange(n) for i in range(n)],
+                            deps=['ROOT' if i == root else rng.choice(deps) for i in range(n)],
+                            pos=[rng.choice(pos) for _ in range(n)])
+            self.assertSameSubjects(doc)
+    
+    def test_time_per_token_stays_flat_on_run_on_texts(self):
+        paragraphs = [text for text, _ in load_corpus()['paragraphs']]
+        per_token = []
+        for count in RUN_ON_SIZES:
+            doc = self.analyzer.nlp(run_on_text(paragraphs, count))
+            best = float('inf')
+            for _ in range(5):
+                started = time.perf_counter()
+                self.analyzer._extract_subjects(doc)
+                best = min(best, time.perf_counter() - started)
+            per_token.append(best / len(doc))
+        
+        self.assertLess(per_token[-1] / per_token[0], MAX_GROWTH, per_token)
+
+
+if __name__ == '__main__':
+    unittest.main()